@@ -0,0 +1,177 @@
+import math
+import random
+import time
+
+from planner import Planner
+
+class AnnealingOptimizer(Planner):
+    """
+    Simulated annealing over pci plans, it could replace DLXOptimizer
+    for edge tables too large to be searched exactly.
+
+    The constraint of DLXOptimizer is kept: neighbors must not use the
+    same pci (0 ~ maxpci-1) and no opt nodes keep origpci % maxpci. A
+    neighbor pair using the same pci is allowed during the search but
+    costs more than the density of all edges, so only plans without
+    such pairs are kept as solutions.
+
+    One move changes the pci of one opt node, its cost change is
+    calculated from the neighbors of the node only.
+    """
+    def __init__(self, edgeTab, maxpci):
+        # basic info
+        self.edgeTab          = edgeTab
+        self.maxpci           = maxpci
+        self.nodecount        = edgeTab.get_node_count()
+        self.edgecount        = edgeTab.get_edge_count()
+        self.opt_nodes        = [node_id for (node_id, pci) in edgeTab.node_need_opt_ids]
+
+        # annealing parameters
+        self.time_budget      = 10.     # seconds
+        self.max_iter         = None    # stop after max_iter moves if it is not None
+        self.start_temp       = None    # default is mean edge density
+        self.end_temp         = 1e-4
+        self.seed             = 0
+
+        # answer info
+        self.solutions        = []      # [(indensity, [[nodeid,pci],...])]
+        self.num_solution     = 10      # keep 10 best solutions
+        self.curr_iter        = 0
+        self.optimal          = False   # never proved
+
+        # neighbors of each node, [[(neighbor_id, density), ...], ...]
+        self.node_neighbors   = [[] for i in range(self.nodecount)]
+        for nodeid1, nodeid2, value in zip(edgeTab.edge_src.tolist(), edgeTab.edge_dst.tolist(),
+                                           edgeTab.edge_values.tolist()):
+            if nodeid1 != nodeid2:
+                self.node_neighbors[nodeid1].append((nodeid2, value))
+                self.node_neighbors[nodeid2].append((nodeid1, value))
+
+        # a pair of neighbors using the same pci costs more than all edges
+        self.penalty          = float(edgeTab.edge_values.sum()) + 1.
+
+        # current plan
+        self.pci              = [0] * self.nodecount
+        for (node_id, pci) in edgeTab.node_dont_opt_ids:
+            self.pci[node_id] = pci % self.maxpci
+        self.density          = 0.
+        self.violations       = 0
+
+    def find_answers(self):
+        self.anneal()
+
+        if len(self.solutions) == 0:
+            print("No answer found")
+        else:
+            self.print_solutions(detailed=True)
+
+    def init_plan(self):
+        """
+        Greedy initial plan, each opt node takes the cheapest pci
+        against the neighbors which already have pci
+        """
+        assigned = [False] * self.nodecount
+        for (node_id, pci) in self.edgeTab.node_dont_opt_ids:
+            assigned[node_id] = True
+        for node_id in self.opt_nodes:
+            costs = [0.] * self.maxpci
+            for neighbor_id, value in self.node_neighbors[node_id]:
+                if assigned[neighbor_id]:
+                    neighbor_pci = self.pci[neighbor_id]
+                    for pci in range(neighbor_pci % 3, self.maxpci, 3):
+                        costs[pci] += value
+                    costs[neighbor_pci] += self.penalty
+            self.pci[node_id] = costs.index(min(costs))
+            assigned[node_id] = True
+
+        self.density    = float(self.edgeTab.calculate_density_batch([self.pci])[0])
+        self.violations = 0
+        for node_id in range(self.nodecount):
+            for neighbor_id, value in self.node_neighbors[node_id]:
+                if neighbor_id > node_id and self.pci[neighbor_id] == self.pci[node_id]:
+                    self.violations += 1
+
+    def move_delta(self, node_id, new_pci):
+        """
+        Return (density change, violation change) if node takes new_pci
+        """
+        old_pci   = self.pci[node_id]
+        old_class = old_pci % 3
+        new_class = new_pci % 3
+        density    = 0.
+        violations = 0
+        pcis = self.pci
+        for neighbor_id, value in self.node_neighbors[node_id]:
+            neighbor_pci = pcis[neighbor_id]
+            neighbor_class = neighbor_pci % 3
+            if neighbor_class == new_class:
+                density += value
+            if neighbor_class == old_class:
+                density -= value
+            if neighbor_pci == new_pci:
+                violations += 1
+            elif neighbor_pci == old_pci:
+                violations -= 1
+        return density, violations
+
+    def anneal(self):
+        rnd = random.Random(self.seed)
+        self.solutions = []
+        self.curr_iter = 0
+        self.init_plan()
+        self.record_solution()
+        if self.opt_nodes == [] or self.maxpci < 2:
+            return
+
+        start_temp = self.start_temp
+        if start_temp is None:
+            start_temp = float(self.edgeTab.edge_values.mean()) if self.edgecount > 0 else 1.
+        end_temp   = min(self.end_temp, start_temp)
+        temp       = start_temp
+        start_ts   = time.time()
+        while self.max_iter is None or self.curr_iter < self.max_iter:
+            # cool down with the time used
+            if self.curr_iter % 1000 == 0:
+                used = (time.time() - start_ts) / self.time_budget
+                if used >= 1.:
+                    break
+                temp = start_temp * (end_temp / start_temp) ** used
+            self.curr_iter += 1
+
+            node_id = rnd.choice(self.opt_nodes)
+            new_pci = rnd.randrange(self.maxpci - 1)
+            if new_pci >= self.pci[node_id]:
+                new_pci += 1
+            density, violations = self.move_delta(node_id, new_pci)
+            delta = density + violations * self.penalty
+            if delta <= 0 or rnd.random() < math.exp(-delta / temp):
+                self.pci[node_id] = new_pci
+                self.density     += density
+                self.violations  += violations
+                if self.violations == 0 and self.density < self.bound_value():
+                    self.record_solution()
+
+    def bound_value(self):
+        if self.solutions == []:
+            return float('inf')
+        return self.solutions[-1][0]
+
+    def record_solution(self):
+        if self.violations != 0:
+            return
+        # recalculate density to drop the float error of the deltas
+        self.density = float(self.edgeTab.calculate_density_batch([self.pci])[0])
+        cellinfo = [[node_id, pci] for node_id, pci in enumerate(self.pci)]
+        for indensity, kept in self.solutions:
+            if kept == cellinfo:
+                return
+        self.solutions.insert(0, (self.density, cellinfo))
+        self.solutions.sort(key=lambda solution: solution[0])
+        self.solutions = self.solutions[:self.num_solution]
+
+    def print_info(self):
+        print("maxpci: ",self.maxpci)
+        print("nodecount: ",self.nodecount)
+        print("edgecount: ",self.edgecount)
+        print("opt nodecount: ",len(self.opt_nodes))
+        print("time budget: ",self.time_budget)
@@ -0,0 +1,202 @@
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from edgeTable import EdgeTable
+from cellInfo import CellInfo
+from dlx import DLXOptimizer
+from dlxArray import ArrayDLXOptimizer
+
+ENGINES = {'dlx': DLXOptimizer, 'array': ArrayDLXOptimizer}
+FCN     = 100
+
+def hex_grid_edges(rows, cols, rings=1, seed=0):
+    """
+    Cells on a rows x cols hex grid, every cell interferes with the
+    cells within rings steps. Return [(cell1, cell2, intensity), ...]
+    with both directions of each pair.
+    """
+    rnd   = random.Random(seed)
+    edges = []
+    for q1 in range(cols):
+        for r1 in range(rows):
+            for q2 in range(max(0, q1 - rings), min(cols, q1 + rings + 1)):
+                for r2 in range(max(0, r1 - rings), min(rows, r1 + rings + 1)):
+                    # hex distance in axial coordinates
+                    dist = (abs(q1 - q2) + abs(r1 - r2) + abs(q1 + r1 - q2 - r2)) // 2
+                    if 0 < dist <= rings:
+                        intensity = rnd.uniform(0.05, 0.5) / dist
+                        edges.append((q1 * rows + r1, q2 * rows + r2, intensity))
+    return rows * cols, edges
+
+def random_geometric_edges(nodecount, degree, seed=0):
+    """
+    Cells at random points of a unit square, cells closer than the
+    radius giving the expected degree interfere with each other
+    """
+    rnd    = random.Random(seed)
+    points = np.array([(rnd.random(), rnd.random()) for i in range(nodecount)])
+    radius = math.sqrt(degree / (math.pi * nodecount))
+    edges  = []
+    for i in range(nodecount):
+        dists = np.sqrt(((points - points[i]) ** 2).sum(axis=1))
+        for j in np.flatnonzero(dists < radius).tolist():
+            if j != i:
+                intensity = rnd.uniform(0.5, 1.) * (1. - dists[j] / radius)
+                edges.append((i, j, intensity))
+    return nodecount, edges
+
+def write_network(path, nodecount, edges, opt_ratio=0.7, seed=0):
+    """
+    Write cell info and table info files of the network, return
+    (cellFileName, tabFileName, maxpci). Pcis come from a greedy
+    coloring so that two no opt cells never conflict, maxpci is big
+    enough to always have an answer.
+    """
+    rnd       = random.Random(seed)
+    neighbors = [set() for i in range(nodecount)]
+    for i, j, intensity in edges:
+        neighbors[i].add(j)
+        neighbors[j].add(i)
+    maxpci = max([len(node_neighbors) for node_neighbors in neighbors] + [0]) + 1
+    maxpci = (maxpci + 2) // 3 * 3
+
+    pcis = [-1] * nodecount
+    for i in range(nodecount):
+        used = set(pcis[j] for j in neighbors[i])
+        pcis[i] = min(set(range(maxpci)) - used)
+
+    cellFileName = os.path.join(path, 'cell.csv')
+    tabFileName  = os.path.join(path, 'tab.csv')
+    with open(cellFileName, 'w') as f:
+        f.write('CellId,SiteId,PCI,EARFCN,PlanFlag\n')
+        for i in range(nodecount):
+            f.write('C{0:06d},S{0:06d},{1},{2},{3}\n'.format(i, pcis[i], FCN, int(rnd.random() < opt_ratio)))
+    with open(tabFileName, 'w') as f:
+        f.write('CellId,CellIdNc,intensity\n')
+        for i, j, intensity in edges:
+            f.write('C{0:06d},C{1:06d},{2:.6f}\n'.format(i, j, intensity))
+    return cellFileName, tabFileName, maxpci
+
+class Benchmark(object):
+    """
+    Run load, dlx matrix construction, search and density scoring on one
+    network, every stage reports seconds, throughput and peak memory
+    traced by tracemalloc (MB). Tracing slows all stages the same way,
+    so results are comparable with a baseline measured the same way.
+    """
+    def __init__(self, name, cellFileName, tabFileName, maxpci, engine='array'):
+        self.name          = name
+        self.cellFileName  = cellFileName
+        self.tabFileName   = tabFileName
+        self.maxpci        = maxpci
+        self.engine        = engine
+        self.max_iter      = 1000    # max_iter_no_new of the search
+        self.num_plans     = 1000    # plans scored by calculate_density_batch
+        self.results       = {}      # {stage: {'seconds':, 'throughput':, 'unit':, 'memory':}}
+
+    def run_stage(self, stage, unit, func):
+        """
+        Run func, it returns (result, count of work done in unit)
+        """
+        tracemalloc.start()
+        start_ts = time.perf_counter()
+        result, count = func()
+        seconds  = time.perf_counter() - start_ts
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.results[stage] = {'seconds'    : seconds,
+                               'throughput' : count / seconds if seconds > 0 else 0.,
+                               'unit'       : unit,
+                               'memory'     : peak / 1e6}
+        return result
+
+    def load(self):
+        cellinfo = CellInfo(self.cellFileName)
+        tab = EdgeTable(self.tabFileName)
+        tab.construct_edge_matrix(cellinfo.get_fcn(FCN))
+        return tab, tab.get_edge_count()
+
+    def build(self, tab):
+        dlx = ENGINES[self.engine](tab, self.maxpci)
+        dlx.max_iter_no_new = self.max_iter
+        return dlx, dlx.num_rows
+
+    def search(self, dlx):
+        dlx.dlx_search()
+        return dlx, dlx.stats.leaves
+
+    def score(self, tab):
+        rnd   = np.random.RandomState(0)
+        plans = rnd.randint(0, self.maxpci, size=(self.num_plans, tab.get_node_count()))
+        return tab.calculate_density_batch(plans), self.num_plans
+
+    def run(self):
+        tab = self.run_stage('load', 'edges/s', self.load)
+        dlx = self.run_stage('build', 'rows/s', lambda: self.build(tab))
+        self.run_stage('search', 'leaves/s', lambda: self.search(dlx))
+        self.run_stage('score', 'plans/s', lambda: self.score(tab))
+        return self.results
+
+def default_networks():
+    """
+    [(name, nodecount, edges)] of the default benchmark suite
+    """
+    networks = []
+    for rows, cols, rings in [(10, 10, 1), (30, 30, 1), (30, 30, 2)]:
+        nodecount, edges = hex_grid_edges(rows, cols, rings)
+        networks.append(('hex{}x{}r{}'.format(rows, cols, rings), nodecount, edges))
+    for nodecount, degree in [(200, 6), (1000, 6), (1000, 12)]:
+        networks.append(('rgg{}d{}'.format(nodecount, degree),) + random_geometric_edges(nodecount, degree))
+    return networks
+
+def print_results(results, baseline=None):
+    """
+    Print results of all networks, with the ratio to baseline throughput
+    and memory if baseline is given
+    """
+    baseline = baseline or {}
+    for name, stages in results.items():
+        print("=========== {} ===========".format(name))
+        for stage, result in stages.items():
+            line = "{0:8s} {1:10.4f}s {2:14.1f} {3:9s} {4:8.2f}MB".format(stage, result['seconds'],
+                                                                         result['throughput'], result['unit'],
+                                                                         result['memory'])
+            base = baseline.get(name, {}).get(stage)
+            if base is not None and base['throughput'] > 0 and base['memory'] > 0:
+                line += "   throughput x{0:.2f}  memory x{1:.2f}".format(result['throughput'] / base['throughput'],
+                                                                        result['memory'] / base['memory'])
+            print(line)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark of the pci planner on synthetic networks')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='array')
+    parser.add_argument('--max-iter', type=int, default=1000, help='max_iter_no_new of the search')
+    parser.add_argument('--baseline', default='data/benchmark_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true', help='save results as the new baseline')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as path:
+        for name, nodecount, edges in default_networks():
+            cellFileName, tabFileName, maxpci = write_network(path, nodecount, edges)
+            bench = Benchmark(name, cellFileName, tabFileName, maxpci, args.engine)
+            bench.max_iter = args.max_iter
+            results[name] = bench.run()
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=1)
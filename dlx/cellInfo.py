@@ -3,6 +3,7 @@ import pandas as pd
 class CellInfo(object):
      def __init__(self, fileName, delimiter=','):
          self.fcn_data = {}
+         self.cells    = None     # cell info indexed by CellId
          self.raw_info = self.__parse_cell_info(fileName)
    
      def get_fcn(self, fcn):
@@ -14,8 +15,11 @@ class CellInfo(object):
          # strip column name         
          df.columns   = [column.strip() for column in df.columns]
 
+         # index by cell id, first one is used if cell id is duplicated
+         self.cells   = df.drop_duplicates('CellId').set_index('CellId')
+
          # seperate data by fcn
-         for fcn in set(df['EARFCN']):
-             self.fcn_data[fcn] = df[df['EARFCN'] == fcn]
+         for fcn, fcn_df in df.groupby('EARFCN'):
+             self.fcn_data[fcn] = fcn_df
 
-         return df
\ No newline at end of file
+         return df
@@ -0,0 +1,136 @@
+import time
+
+from dlxArray import ArrayDLXOptimizer
+from edgeTable import EdgeTable
+from planner import Planner
+
+def optimize_edge_arrays(arrays, maxpci, optimizer, options, deadline=None):
+    """
+    Optimize the edge table given by EdgeTable.to_arrays, every component
+    is optimized by it either in this process or in another one. The
+    search stops at deadline, see Planner.get_deadline. Return
+    (solutions, optimal, timed_out).
+    """
+    dlx = optimizer(EdgeTable.from_arrays(arrays), maxpci)
+    for name, value in options.items():
+        setattr(dlx, name, value)
+    if deadline is not None:
+        # a component started after the deadline still gets one short search
+        dlx.time_budget = max(deadline - time.time(), 0.)
+    if dlx.warm_start:
+        dlx.seed_greedy()
+    dlx.dlx_search()
+    return dlx.solutions, dlx.curr_iter != dlx.max_iter_no_new and not dlx.timed_out, dlx.timed_out
+
+class ComponentOptimizer(Planner):
+    """
+    Nodes in different connected components of the edge table never
+    affect each other, so each component is optimized by its own
+    optimizer and the best solutions of all components are merged.
+
+    The merged solutions are the num_solution best combinations of the
+    component solutions, node ids in them are ids of the whole edge table.
+    """
+    def __init__(self, edgeTab, maxpci, optimizer=ArrayDLXOptimizer):
+        self.edgeTab          = edgeTab
+        self.maxpci           = maxpci
+        self.optimizer        = optimizer
+        self.components       = edgeTab.get_components()
+
+        # answer info
+        self.solutions        = []      # [(indensity, [[nodeid,pci],...])]
+        self.optimal          = False   # every component is optimal
+        self.timed_out        = False   # any component stopped by time_budget
+        self.time_budget      = None    # seconds for all components, stop searching after it if not None
+        self.init_options()             # passed to optimizer of each component
+
+    def find_answers(self, executor=None):
+        """
+        Optimize components one by one, or all at once in the given
+        concurrent.futures executor
+        """
+        deadline = self.get_deadline()
+        if executor is None:
+            results = (self.optimize_component(node_ids, deadline) for node_ids in self.components)
+        else:
+            results = (future.result() for future in self.submit(executor, deadline))
+        self.merge_results(results)
+
+        if len(self.solutions) == 0:
+            print("No answer found")
+        else:
+            self.print_solutions(detailed=True)
+
+    def optimize_component(self, node_ids, deadline=None):
+        """
+        Optimize one component, node ids in the solutions are ids
+        of the component. Return (solutions, optimal, timed_out).
+        """
+        return optimize_edge_arrays(self.edgeTab.sub_table(node_ids).to_arrays(),
+                                    self.maxpci, self.optimizer, self.get_options(), deadline)
+
+    def submit(self, executor, deadline=None):
+        """
+        Submit one job per component to the executor, return the futures
+        in the same order as self.components
+        """
+        return [executor.submit(optimize_edge_arrays, self.edgeTab.sub_table(node_ids).to_arrays(),
+                                self.maxpci, self.optimizer, self.get_options(), deadline)
+                for node_ids in self.components]
+
+    def merge_results(self, results):
+        """
+        Merge (solutions, optimal, timed_out) of each component, results should be
+        in the same order as self.components.
+
+        Combinations are merged component by component as (indensity,
+        index in combinations of previous components, index in component
+        solutions), node lists are only built for the num_solution best
+        combinations at the end.
+        """
+        merged     = [(0., -1, -1)]
+        choices    = []         # combinations after each component
+        components = []         # solutions of each component, with ids of whole table
+        self.optimal   = True
+        self.timed_out = False
+        for node_ids, (solutions, optimal, timed_out) in zip(self.components, results):
+            self.timed_out = self.timed_out or timed_out
+            if solutions == []:
+                # one component has no answer, so does the whole table
+                merged = []
+                break
+            merged = self.merge_solutions(merged, solutions)
+            choices.append(merged)
+            components.append([[[node_ids[node_id], pci] for [node_id, pci] in cellinfo]
+                               for indensity, cellinfo in solutions])
+            self.optimal = self.optimal and optimal
+
+        self.solutions = []
+        for indensity, prev, index in merged:
+            cellinfo = []
+            for i in reversed(range(len(choices))):
+                cellinfo.extend(components[i][index])
+                if i > 0:
+                    _, prev, index = choices[i - 1][prev]
+            cellinfo.sort()
+            self.solutions.append((indensity, cellinfo))
+
+    def merge_solutions(self, merged, solutions):
+        """
+        Both lists are sorted by indensity, return the num_solution best
+        (indensity, index in merged, index in solutions) combinations of
+        one entry from each list
+        """
+        combined = []
+        for i, (indensity1, prev, index) in enumerate(merged):
+            for j, (indensity2, cellinfo) in enumerate(solutions):
+                combined.append((indensity1 + indensity2, i, j))
+        combined.sort(key=lambda solution: solution[0])
+        return combined[:self.num_solution]
+
+    def print_info(self):
+        print("maxpci: ",self.maxpci)
+        print("nodecount: ",self.edgeTab.get_node_count())
+        print("edgecount: ",self.edgeTab.get_edge_count())
+        print("components: ",len(self.components))
+        print("max component nodecount: ",max([len(node_ids) for node_ids in self.components] or [0]))
@@ -1,6 +1,52 @@
 import numpy as np
+from scipy import sparse
+from array import array
 import copy
-import pandas as pd
+import heapq
+import json
+import os
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from edgeTable import EdgeTable
+from searchStats import SearchStats
+from planner import Planner
+
+# optimizer of subtree search worker process
+subtree_optimizer = None
+subtree_deadline  = None    # time.time() when all subtree searches should stop
+
+def init_subtree_worker(optimizer, arrays, maxpci, options, shared_bound, deadline=None):
+    """
+    Build the optimizer once in each worker process
+    """
+    global subtree_optimizer, subtree_deadline
+    subtree_optimizer = optimizer(EdgeTable.from_arrays(arrays), maxpci)
+    for name, value in options.items():
+        setattr(subtree_optimizer, name, value)
+    subtree_optimizer.shared_bound = shared_bound
+    subtree_optimizer.verbose      = False
+    subtree_deadline = deadline
+
+def search_subtree(prefix):
+    """
+    Search the subtree under the partial answer prefix with the optimizer
+    of this worker, return (solutions, optimal, timed_out, stats of the
+    search). Subtrees not started before the deadline are skipped.
+    """
+    dlx = subtree_optimizer
+    dlx.solutions = []
+    dlx.curr_iter = 0
+    dlx.stats     = SearchStats(dlx.nodecount)
+    if subtree_deadline is not None:
+        dlx.time_budget = subtree_deadline - time.time()
+        if dlx.time_budget <= 0:
+            return [], False, True, dlx.stats
+    chosen = dlx.choose_prefix(prefix)
+    dlx.dlx_search(len(prefix))
+    dlx.unchoose_prefix(chosen)
+    return dlx.solutions, dlx.curr_iter != dlx.max_iter_no_new and not dlx.timed_out, dlx.timed_out, dlx.stats
 
 class Node(object):
     """
@@ -17,7 +63,7 @@ class Node(object):
         self.col_header = col_header
         self.row_header = row_header
 
-class DLXOptimizer(object):
+class DLXOptimizer(Planner):
     """
     Dlx Optimizer is to optimize following matrix
 
@@ -79,12 +125,65 @@ class DLXOptimizer(object):
         # answer info
         self.answer           = [-1] * self.nodecount
         self.solutions        = []      # [(indensity, [[nodeid,pci],...])]
-        self.num_solution     = 10      # keep 10 best solutions
-        self.max_iter_no_new  = 5000    # if no better solution after 100000 iteration, stop 
+        self.solution_heap    = []      # solutions during search, see push_solution
+        self.solution_keys    = set()   # pss of each node of kept solutions if dedup
         self.curr_iter        = 0
+        self.optimal          = False   # search finished without stopped by max_iter_no_new
+        self.shared_bound     = None    # multiprocessing.Value, least worst solution of all workers
+        self.init_options()             # num_solution, bound, ..., see planner.SEARCH_OPTIONS
+        self.time_budget      = None    # seconds, stop searching after it if not None
+        self.timed_out        = False   # last search stopped by time_budget
+        self.checkpoint_file  = None    # save search frontier and solutions to it, see resume
+        self.checkpoint_interval = 60.  # seconds between two checkpoints
+        self.verbose          = True    # print when stopped by max_iter_no_new
+
+        # incremental density info, density[level] is the total density
+        # of the nodes chosen in answer[:level]
+        self.node_pci_class   = [-1] * self.nodecount
+        self.pci_used         = [0] * self.maxpci
+        self.density          = [0.] * (self.nodecount + 1)
+        self.col_class_size   = None    # bound mode counters, see init_bound_info
+        self.class_density    = None
+
+        # search statistics, set self.stats.trace to record every kept solution
+        self.stats            = SearchStats(self.nodecount)
 
         # construct dlx matrix
+        build_ts = time.perf_counter()
+        self.init_density_info()
         self.construct_matrix()
+        self.stats.build_time = time.perf_counter() - build_ts
+
+    def init_density_info(self):
+        # node id, pci % 3 and node id * maxpci + pci of each row
+        self.row_node         = [0] * self.num_rows
+        self.row_pci_class    = [0] * self.num_rows
+        self.row_code         = [0] * self.num_rows
+        for row_id in range(self.num_rows):
+            node_id, pci = self.row_to_nodeid_pci(row_id)
+            self.row_node[row_id]      = node_id
+            self.row_pci_class[row_id] = (pci % self.maxpci) % 3
+            self.row_code[row_id]      = node_id * self.maxpci + pci % self.maxpci
+
+        # pcis of no opt nodes are never interchangeable, pci classes are
+        # interchangeable only if they have same number of pcis
+        self.pci_fixed        = [False] * self.maxpci
+        for (node_id, pci) in self.edgeTab.node_dont_opt_ids:
+            self.pci_fixed[pci % self.maxpci] = True
+        self.class_symmetry   = self.no_opt_nodecount == 0 and self.maxpci % 3 == 0
+
+        # node id and number of edges of the node of each node column
+        self.col_node         = [node_id for (node_id, pci)
+                                 in self.edgeTab.node_dont_opt_ids + self.edgeTab.node_need_opt_ids]
+        self.col_degree       = [len(self.edgeTab.get_all_edge_ids(node_id)) for node_id in self.col_node]
+
+        # neighbors of each node, [[(neighbor_id, density), ...], ...]
+        self.node_neighbors   = [[] for i in range(self.nodecount)]
+        for nodeid1, nodeid2, value in zip(self.edgeTab.edge_src.tolist(), self.edgeTab.edge_dst.tolist(),
+                                           self.edgeTab.edge_values.tolist()):
+            self.node_neighbors[nodeid1].append((nodeid2, value))
+            if nodeid2 != nodeid1:
+                self.node_neighbors[nodeid2].append((nodeid1, value))
 
     def construct_matrix(self):        
         self.root = Node()
@@ -154,105 +253,557 @@ class DLXOptimizer(object):
             self.col_size[col_id] += 1
 
     def find_answers(self):
-        self.dlx_search(level = 0)
+        if self.warm_start:
+            self.seed_greedy()
+        self.dlx_search()
+        self.optimal = self.curr_iter != self.max_iter_no_new and not self.timed_out
 
         if len(self.solutions) == 0:
             print("No answer found")
         else:            
             self.print_solutions(detailed=True)
                  
-    def dlx_search(self, level):
+    def find_answers_parallel(self, workers=None, split_level=1):
+        """
+        Split the search tree at split_level, each partial answer at
+        that level is searched by a worker process. With self.bound set,
+        workers prune against the worst solution kept by any of them.
+        Counters of the workers are added up in self.stats. With
+        self.time_budget set, it is the budget of the whole search.
+        """
+        options = self.get_options()
+        deadline = self.get_deadline()
+        seeded = []
+        if self.warm_start:
+            seeded = self.seed_greedy()
+        shared_bound = multiprocessing.Value('d', float('inf'))
+        if seeded != [] and self.num_solution == 1:
+            shared_bound.value = seeded[0][0]
+        prefixes     = self.split_answers(split_level)
+        self.stats.start_search()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_subtree_worker,
+                                 initargs=(type(self), self.edgeTab.to_arrays(), self.maxpci,
+                                           options, shared_bound, deadline)) as executor:
+            results = list(executor.map(search_subtree, prefixes))
+        self.stats.stop_search()
+
+        self.solutions = list(seeded)
+        self.optimal   = True
+        self.timed_out = False
+        stopped        = 0      # subtrees stopped by max_iter_no_new
+        for solutions, optimal, timed_out, stats in results:
+            self.solutions.extend(solutions)
+            self.optimal   = self.optimal and optimal
+            self.timed_out = self.timed_out or timed_out
+            self.stats.add(stats)
+            stopped += not optimal and not timed_out
+        if stopped > 0 and self.verbose:
+            print("not better solution found after {} iteration in {} of {} subtrees".format(
+                  self.max_iter_no_new, stopped, len(prefixes)))
+        self.solutions.sort(key=lambda solution: solution[0])
+        self.solutions = self.solutions[:self.num_solution]
+
+        if len(self.solutions) == 0:
+            print("No answer found")
+        else:            
+            self.print_solutions(detailed=True)
+
+    def seed_greedy(self):
+        """
+        Replace self.solutions with the plan of GreedyPlanner, so that
+        the search only keeps solutions better than it. Return the new
+        self.solutions.
+        """
+        from greedyPlanner import GreedyPlanner
+        planner = GreedyPlanner(self.edgeTab, self.maxpci)
+        planner.plan()
+        self.solutions = planner.solutions
+        return self.solutions
+
+    def split_answers(self, split_level):
+        """
+        Return all partial answers (row ids of the first split_level
+        levels) which are not dead ends yet
+        """
+        prefixes = []
+        def expand(level, prefix):
+            if level == min(split_level, self.nodecount):
+                prefixes.append(list(prefix))
+                return
+            col_header = self.choose_column()
+            if col_header is None:
+                return
+            rows = self.column_rows(col_header)
+            if self.symmetry:
+                rows = self.symmetry_rows(rows)
+            self.remove(col_header)
+            for row in rows:
+                self.choose_row(level, row)
+                prefix.append(self.row_header(row))
+                expand(level + 1, prefix)
+                prefix.pop()
+                self.unchoose_row(level, row)
+            self.recover(col_header)
+        expand(0, [])
+        return prefixes
+
+    def choose_prefix(self, prefix):
+        """
+        Choose rows of a partial answer level by level, return the
+        chosen (column header, row) to be passed to unchoose_prefix
+        """
+        chosen = []
+        for level, row_id in enumerate(prefix):
+            col_header = self.choose_column()
+            for row in self.column_rows(col_header):
+                if self.row_header(row) == row_id:
+                    break
+            self.remove(col_header)
+            self.choose_row(level, row)
+            chosen.append((col_header, row))
+        return chosen
+
+    def unchoose_prefix(self, chosen):
+        for level in reversed(range(len(chosen))):
+            col_header, row = chosen[level]
+            self.unchoose_row(level, row)
+            self.recover(col_header)
+
+    def dlx_search(self, level=0, frontier=None):
         # find all possible combination of row indices to make
         # the first self.nodecount columns to be covered.
-    
-        # no better answer found for max iteration, return True
-        # and popup current solutions
-        if self.curr_iter == self.max_iter_no_new:
-            return True
-
-        # check if we already found result
-        if level == self.nodecount:
-            # We must already found result, record the answer
-            self.curr_iter += 1
-            tot_indensity, answer_list = self.answer_to_solution(self.answer)
-            if self.solutions == []:
-                self.solutions.append((tot_indensity,answer_list))
-                self.curr_iter = 0
-            elif tot_indensity < self.solutions[-1][0]:
-                self.solutions.insert(0,(tot_indensity,answer_list))
-                self.solutions.sort()
-                self.solutions = self.solutions[:self.num_solution]
-                # better answer has been found
-                self.curr_iter = 0
-            if self.curr_iter == self.max_iter_no_new:
-                print("not better solution found after {} iteration".format(self.max_iter_no_new))
-            return True                
+        for solution in self.iter_solutions(level, frontier):
+            pass
+
+    def iter_solutions(self, start_level=0, frontier=None):
+        """
+        Non recursive dlx search, rows are tried in the same order as
+        a recursive search would do. Every time a better solution is
+        kept, (indensity, [[nodeid,pci],...]) is yielded, the search
+        is paused until next solution is asked for. Closing the
+        generator before the search ends restores the matrix.
+
+        start_level is the number of rows already chosen, see choose_prefix.
+        frontier is the search state saved in a checkpoint, the search
+        goes on from there, see resume.
+
+        The search stops after self.time_budget seconds. If
+        self.checkpoint_file is set, the frontier and solutions are saved
+        to it every self.checkpoint_interval seconds and when the search
+        stops, checkpoints are only saved when start_level is 0.
+        """
+        # one frame per level, [column header, rows of column, index of next row]
+        stack = []
+        level = start_level
+        stats = self.stats
+        level_visits = stats.level_visits
+        stats.start_search()
+        self.load_solution_heap()
+        if self.bound:
+            self.init_bound_info()
+        self.timed_out = False
+        stopped  = False       # stopped by the search itself, not by closing the generator
+        checking = self.time_budget is not None or self.checkpoint_file is not None
+        start_ts = time.perf_counter()
+        checkpoint_ts = start_ts
+        ticks    = 0
+        try:
+            if frontier is not None:
+                level = self.restore_frontier(stack, start_level, frontier)
+
+            while True:
+                # no better answer found for max iteration, stop
+                if self.curr_iter == self.max_iter_no_new:
+                    stopped = True
+                    return
+
+                # check time once every 1024 loops
+                ticks += 1
+                if checking and ticks & 1023 == 0:
+                    now = time.perf_counter()
+                    if self.time_budget is not None and now - start_ts >= self.time_budget:
+                        self.timed_out = stopped = True
+                        return
+                    if self.checkpoint_file is not None and start_level == 0 and \
+                       now - checkpoint_ts >= self.checkpoint_interval:
+                        self.save_checkpoint(self.checkpoint_file, stack)
+                        checkpoint_ts = now
+
+                if level == self.nodecount:
+                    # We must already found result, record the answer
+                    self.curr_iter += 1
+                    stats.leaves += 1
+                    tot_indensity = self.density[level]
+                    if tot_indensity < self.bound_value() and self.push_solution(tot_indensity):
+                        # better answer has been found
+                        self.curr_iter = 0
+                        self.update_shared_bound()
+                        stats.record_solution(tot_indensity)
+                        yield (tot_indensity, self.answer_to_list(self.answer))
+                    if self.curr_iter == self.max_iter_no_new and self.verbose:
+                        print("not better solution found after {} iteration".format(self.max_iter_no_new))
+                elif self.prune(level):
+                    # a pruned subtree is one more iteration without better
+                    # answer, or max_iter_no_new would never be reached when
+                    # most subtrees are pruned
+                    self.curr_iter += 1
+                    stats.pruned += 1
+                    if self.curr_iter == self.max_iter_no_new and self.verbose:
+                        print("not better solution found after {} iteration".format(self.max_iter_no_new))
+                else:
+                    col_header = self.choose_column()
+                    if col_header is not None:
+                        # remove nodes of chosen columns from matrix
+                        # the rows which contains any chosen nodes are also removed from matrix
+                        rows = self.column_rows(col_header)
+                        if self.symmetry:
+                            rows = self.symmetry_rows(rows)
+                        self.remove(col_header)
+                        stack.append([col_header, rows, 0])
+
+                # go back to the deepest level which still has rows to try
+                while stack != []:
+                    frame = stack[-1]
+                    level = start_level + len(stack) - 1
+                    if frame[2] > 0:
+                        self.unchoose_row(level, frame[1][frame[2] - 1])
+                    if frame[2] < len(frame[1]):
+                        self.choose_row(level, frame[1][frame[2]])
+                        level_visits[level] += 1
+                        frame[2] += 1
+                        level += 1
+                        break
+                    # all rows tried, restore original
+                    self.recover(frame[0])
+                    stack.pop()
+                else:
+                    stopped = True
+                    return
+        finally:
+            if stopped and self.checkpoint_file is not None and start_level == 0:
+                self.save_checkpoint(self.checkpoint_file, stack)
+            # search stopped early, restore the matrix
+            while stack != []:
+                frame = stack.pop()
+                if frame[2] > 0:
+                    self.unchoose_row(start_level + len(stack), frame[1][frame[2] - 1])
+                self.recover(frame[0])
+            self.clear_bound_info()
+            self.solutions = self.heap_to_solutions()
+            stats.stop_search()
+
+    def restore_frontier(self, stack, start_level, frontier):
+        """
+        Choose the rows of a saved frontier level by level, frames are
+        pushed to stack, return the level to go on with. Column choice
+        is the same as the saved search, so each column gives the same
+        rows as it did.
+        """
+        level = start_level
+        for row_ids, index in frontier:
+            col_header = self.choose_column()
+            rows = self.column_rows(col_header)
+            if self.symmetry:
+                rows = self.symmetry_rows(rows)
+            assert([self.row_header(row) for row in rows] == row_ids)
+            self.remove(col_header)
+            stack.append([col_header, rows, index])
+            self.choose_row(level, rows[index - 1])
+            level += 1
+        return level
+
+    def save_checkpoint(self, fileName, stack):
+        """
+        Save the frontier of the search (row ids of each level and index
+        of the next row to try), the kept solutions and the options. An
+        empty frontier means the search has finished.
+        """
+        checkpoint = {'nodecount' : self.nodecount,
+                      'maxpci'    : self.maxpci,
+                      'num_rows'  : self.num_rows,
+                      'options'   : self.get_options(),
+                      'curr_iter' : self.curr_iter,
+                      'frontier'  : [[[self.row_header(row) for row in rows], index]
+                                     for col_header, rows, index in stack],
+                      'solutions' : [[indensity, cellinfo] for indensity, cellinfo in self.heap_to_solutions()]}
+        tmpFileName = fileName + '.tmp'
+        with open(tmpFileName, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmpFileName, fileName)
+
+    def resume(self, fileName):
+        """
+        Go on with the search saved in the checkpoint file, the optimizer
+        should be built from the same edge table and maxpci. New
+        checkpoints are saved to the same file unless self.checkpoint_file
+        is set to another one.
+        """
+        with open(fileName) as f:
+            checkpoint = json.load(f)
+        assert((checkpoint['nodecount'], checkpoint['maxpci'], checkpoint['num_rows'])
+               == (self.nodecount, self.maxpci, self.num_rows))
+        for name, value in checkpoint['options'].items():
+            setattr(self, name, value)
+        self.curr_iter = checkpoint['curr_iter']
+        self.solutions = [(indensity, cellinfo) for indensity, cellinfo in checkpoint['solutions']]
+        if self.checkpoint_file is None:
+            self.checkpoint_file = fileName
+
+        if checkpoint['frontier'] != []:
+            self.dlx_search(0, checkpoint['frontier'])
+            self.optimal = self.curr_iter != self.max_iter_no_new and not self.timed_out
+        else:
+            self.optimal = self.curr_iter != self.max_iter_no_new
+
+        if len(self.solutions) == 0:
+            print("No answer found")
+        else:
+            self.print_solutions(detailed=True)
+
+    def load_solution_heap(self):
+        """
+        Move self.solutions into the heap used during search.
+
+        The heap holds num_solution entries (-indensity, codes, pss) with
+        the worst solution on top, codes is an array of -(node_id * maxpci
+        + pci) of each level and pss is the pss of each node as bytes, a
+        solution is only turned into [[nodeid,pci],...] when the search
+        stops. Solutions of same indensity are ordered by [[nodeid,pci],...]
+        as list sort does.
+        """
+        self.solution_heap = []
+        self.solution_keys = set()
+        for indensity, cellinfo in self.solutions:
+            codes = array('l', [-(node_id * self.maxpci + pci % self.maxpci) for node_id, pci in cellinfo])
+            self.add_solution_entry(indensity, codes)
+
+    def push_solution(self, indensity):
+        """
+        Keep the current answer, return False if it is dropped since a
+        solution with same pss is already kept
+        """
+        row_code = self.row_code
+        codes = array('l', [-row_code[row_id] for row_id in self.answer])
+        return self.add_solution_entry(indensity, codes)
+
+    def add_solution_entry(self, indensity, codes):
+        pss = b''
+        if self.dedup:
+            classes = bytearray(self.nodecount)
+            for code in codes:
+                classes[(-code) // self.maxpci] = ((-code) % self.maxpci) % 3
+            pss = bytes(classes)
+            if pss in self.solution_keys:
+                return False
+            self.solution_keys.add(pss)
+
+        heapq.heappush(self.solution_heap, (-indensity, codes, pss))
+        if len(self.solution_heap) > self.num_solution:
+            _, _, dropped = heapq.heappop(self.solution_heap)
+            self.solution_keys.discard(dropped)
+        return True
+
+    def heap_to_solutions(self):
+        """
+        Return solutions in the heap, best first
+        """
+        solutions = []
+        for indensity, codes, pss in sorted(self.solution_heap, reverse=True):
+            solutions.append((-indensity, [[(-code) // self.maxpci, (-code) % self.maxpci] for code in codes]))
+        return solutions
+
+    def bound_value(self):
+        """
+        Density a new solution should be less than to be kept, it is the
+        worst kept solution or the shared one of all workers if it's less
+        """
+        value = float('inf')
+        if self.solution_heap != []:
+            value = -self.solution_heap[0][0]
+        if self.shared_bound is not None:
+            value = min(value, self.shared_bound.value)
+        return value
+
+    def update_shared_bound(self):
+        # num_solution solutions no worse than the worst one are found,
+        # no need to keep any solution worse than it in all workers
+        if self.shared_bound is None or len(self.solution_heap) < self.num_solution:
+            return
+        with self.shared_bound.get_lock():
+            if -self.solution_heap[0][0] < self.shared_bound.value:
+                self.shared_bound.value = -self.solution_heap[0][0]
+
+    def prune(self, level):
+        """
+        In bound mode, True if partial density and the least density left
+        nodes could add can't beat the worst kept solution
+        """
+        if not self.bound:
+            return False
+        value = self.bound_value()
+        return value != float('inf') and self.density[level] + self.lower_bound() >= value
+
+    def choose_row(self, level, row):
+        # record current choice of row id
+        row_id = self.row_header(row)
+        self.answer[level] = row_id
+        node_id = self.row_node[row_id]
+        self.node_pci_class[node_id] = self.row_pci_class[row_id]
+        self.pci_used[self.row_code[row_id] % self.maxpci] += 1
+        self.density[level + 1] = self.density[level] + self.node_density(node_id)
+        if self.class_density is not None:
+            self.add_class_density(node_id, self.row_pci_class[row_id], 1.)
+
+        # remove nodes which conflict with current chosen node
+        self.cover_row(row)
+
+    def unchoose_row(self, level, row):
+        # recover removed nodes
+        self.uncover_row(row)
+        row_id = self.row_header(row)
+        if self.class_density is not None:
+            self.add_class_density(self.row_node[row_id], self.row_pci_class[row_id], -1.)
+        self.node_pci_class[self.row_node[row_id]] = -1
+        self.pci_used[self.row_code[row_id] % self.maxpci] -= 1
+        self.answer[level] = -1
+
+    def add_class_density(self, node_id, pci_class, sign):
+        class_density = self.class_density
+        for neighbor_id, value in self.node_neighbors[node_id]:
+            class_density[neighbor_id * 3 + pci_class] += sign * value
+
+    def symmetry_rows(self, rows):
+        """
+        Drop the rows whose pci is interchangeable with the pci of another
+        row, only one plan of each group of equivalent plans is searched.
+
+        Two pcis of same class (pci % 3) not used by any chosen or no opt
+        node are interchangeable, swapping them in the rest of the plan
+        changes neither density nor conflicts, so only the least one is
+        tried. Without no opt nodes and with maxpci % 3 == 0, two classes
+        not used yet are interchangeable too, only the least one is tried.
+        """
+        maxpci   = self.maxpci
+        pci_used = self.pci_used
+        allowed  = [False] * maxpci
+        class_free = [True, True, True]
+        for pci in range(maxpci):
+            if pci_used[pci] > 0 or self.pci_fixed[pci]:
+                allowed[pci] = True
+                class_free[pci % 3] = False
+        first_free_class = True
+        for pci_class in range(3):
+            if class_free[pci_class] and self.class_symmetry:
+                if not first_free_class:
+                    continue
+                first_free_class = False
+            for pci in range(pci_class, maxpci, 3):
+                if not allowed[pci]:
+                    allowed[pci] = True
+                    break
+
+        row_code = self.row_code
+        return [row for row in rows if allowed[row_code[self.row_header(row)] % maxpci]]
+
+    def choose_column(self):
+        """
+        Return the header of next column to be covered, None if
+        the search can't go on from here
+
+        With column_choice 'first', the first node column left is chosen.
+        With 'mrv', the node column with least rows left is chosen, ties
+        are broken by more edges of the node, then by less column id.
+        """
         node_start = self.root.right
-        if node_start.col_header > self.nodecount: 
+        if node_start.col_header >= self.nodecount: 
             # possible? The column is removed by mistake?                        
-            return False
+            return None
         elif self.col_size[node_start.col_header] == 0:
             # no candicates left in column
-            return False
-        
-        # 20180806, there's no unique solution to the problem, 
-        # starting with column hasing least items could cause
-        # infinite loop
-        ## start withs the column with least number of items
-        # node_remove = node_start
-        #min_size    = self.col_size[node_start.col_header]        
-        #while node_start.col_header < self.nodecount - level:                    
-        #    if self.col_size[node_start.col_header] == 0:
-        #        # the column has no solution
-        #        return False
-        #    if self.col_size[node_start.col_header] < min_size:
-        #        min_size    = self.col_size[node_start.col_header]
-        #        node_remove = node_start
-        #    node_start = node_start.right 
-        
+            return None
+        elif self.column_choice == 'first':
+            return node_start
+
+        # 20180806, scanning "col_header < self.nodecount - level" could
+        # pass edge columns and choose them, which caused infinite loop.
+        # Only node columns are scanned now, they are always in front of
+        # edge columns in the header list.
+        col_size    = self.col_size
+        col_degree  = self.col_degree
         node_remove = node_start
-        
-        # remove nodes of chosen columns from matrix
-        # the rows which contains any chosen nodes are also removed from matrix
-        self.remove(node_remove)
-
-        # try find answers
-        node_down = node_remove.down
-        while node_down != node_remove:
-            # record current choice of row id
-            self.answer[level] = node_down.row_header
-            
-            # remove nodes which conflict with current chosen node
-            node_right = node_down.right
-            while node_right != node_down:
-                self.remove(self.col_headers[node_right.col_header])
-                node_right = node_right.right
+        min_size    = col_size[node_start.col_header]
+        max_degree  = col_degree[node_start.col_header]
+        node_start  = node_start.right
+        while node_start != self.root and node_start.col_header < self.nodecount:
+            col  = node_start.col_header
+            size = col_size[col]
+            if size < min_size or (size == min_size and col_degree[col] > max_degree):
+                if size == 0:
+                    # the column has no solution
+                    return None
+                min_size    = size
+                max_degree  = col_degree[col]
+                node_remove = node_start
+            node_start = node_start.right
+        return node_remove
+
+    def remaining_columns(self):
+        """
+        Return ids of the node columns not covered yet
+        """
+        cols = []
+        node_right = self.root.right
+        while node_right != self.root and node_right.col_header < self.nodecount:
+            cols.append(node_right.col_header)
+            node_right = node_right.right
+        return cols
+
+    def column_rows(self, column_header):
+        """
+        Return the rows still linked in given column
+        """
+        rows = []
+        node_down = column_header.down
+        while node_down != column_header:
+            rows.append(node_down)
+            node_down = node_down.down
+        return rows
 
-            # continue next level            
-            if self.dlx_search(level + 1):
-                self.answer[level] = -1                             
+    def row_header(self, row):
+        return row.row_header
 
-            # recover removed nodes
-            node_left = node_down.left
-            while node_left != node_down:
-                self.recover(self.col_headers[node_left.col_header])
-                node_left = node_left.left
+    def cover_row(self, row):
+        """
+        Remove all columns of the given row except the one it is chosen from
+        """
+        node_right = row.right
+        while node_right != row:
+            self.remove(self.col_headers[node_right.col_header])
+            node_right = node_right.right
 
-            node_down = node_down.down
+    def uncover_row(self, row):
+        """
+        Recover the columns removed by cover_row, in reverse order
+        """
+        node_left = row.left
+        while node_left != row:
+            self.recover(self.col_headers[node_left.col_header])
+            node_left = node_left.left
 
-        # previous recover failed, restore original
-        self.recover(node_remove)
-            
     def remove(self, column_header):
+        self.stats.covers += 1
         # remove column
         column_header.left.right = column_header.right
         column_header.right.left = column_header.left
 
         node_down = column_header.down
+        class_size = self.col_class_size
 
         # move downwards vertically node by node, 
         while node_down != column_header:
             node_right = node_down.right
+            if class_size is not None:
+                class_size[self.row_class_col[node_down.row_header]] -= 1
 
             # remove this row vertically
             while node_right != node_down:
@@ -268,15 +819,19 @@ class DLXOptimizer(object):
             node_down = node_down.down
 
     def recover(self, column_header):
+        self.stats.uncovers += 1
         # restore this column
         column_header.right.left = column_header
         column_header.left.right = column_header
 
         node_up = column_header.up
+        class_size = self.col_class_size
 
         # move upwards vertically node by node
         while node_up != column_header:
             node_left = node_up.left
+            if class_size is not None:
+                class_size[self.row_class_col[node_up.row_header]] += 1
 
             while node_left != node_up:
                 # restore this row vertically
@@ -291,26 +846,80 @@ class DLXOptimizer(object):
             # move on to the up node
             node_up = node_up.up
 
-    def print_solutions(self, detailed=False):
-        if detailed:            
-            if len(self.solutions) > 5:
-                print("too much solutions, only 5 best will be showed")
-            for i, (indensity, cellinfo) in enumerate(self.solutions[:5]):                
-                print("=========== solution {0:3d} indensity {1:10f} ===========".format(i,indensity))
-                for [node_id, pci] in cellinfo:
-                    node_name = self.edgeTab.get_node_name(node_id)
-                    print("{0:20s}:{1:5d}".format(node_name,pci))                            
-        else:
-            print("{} possible solutions".format(len(self.answers)))
+    def node_density(self, node_id):
+        """
+        Density between the node and its neighbors which already
+        have pci of same class (pci % 3)
+        """
+        density   = 0.
+        pci_class = self.node_pci_class[node_id]
+        node_pci_class = self.node_pci_class
+        for neighbor_id, value in self.node_neighbors[node_id]:
+            if node_pci_class[neighbor_id] == pci_class:
+                density += value
+        return density
+
+    def init_bound_info(self):
+        """
+        Counters kept up to date during a bound mode search, so that
+        lower_bound doesn't scan rows and neighbors
 
-    def answer_to_solution(self, answer):
+            col_class_size[col*3+c]  rows of pci class c left in node column
+            class_density[node*3+c]  density between the node and its
+                                     chosen neighbors of pci class c
+        """
+        self.row_class_col  = [0] * self.num_rows
+        for row_id in range(self.num_rows):
+            if row_id < self.no_opt_nodecount:
+                col = row_id
+            else:
+                col = self.no_opt_nodecount + (row_id - self.no_opt_nodecount) // self.maxpci
+            self.row_class_col[row_id] = col * 3 + self.row_pci_class[row_id]
+
+        col_class_size = [0] * (self.nodecount * 3)
+        for col in self.remaining_columns():
+            for row in self.column_rows(self.col_headers[col]):
+                col_class_size[self.row_class_col[self.row_header(row)]] += 1
+        class_density  = [0.] * (self.nodecount * 3)
+        for node_id, pci_class in enumerate(self.node_pci_class):
+            if pci_class >= 0:
+                for neighbor_id, value in self.node_neighbors[node_id]:
+                    class_density[neighbor_id * 3 + pci_class] += value
+        self.col_class_size = col_class_size
+        self.class_density  = class_density
+
+    def clear_bound_info(self):
+        self.col_class_size = None
+        self.class_density  = None
+
+    def lower_bound(self):
+        """
+        Admissible lower bound of the density the nodes not chosen yet
+        will add. Each of them adds at least the density to its chosen
+        neighbors of the cheapest pci class left in its column, density
+        between two nodes not chosen yet is not counted.
+        """
+        bound = 0.
+        col_class_size = self.col_class_size
+        class_density  = self.class_density
+        col_node       = self.col_node
+        for col in self.remaining_columns():
+            least = float('inf')
+            base  = col_node[col] * 3
+            for pci_class in range(3):
+                if col_class_size[col * 3 + pci_class] > 0 and class_density[base + pci_class] < least:
+                    least = class_density[base + pci_class]
+            # least is inf if node has no pci left, no answer in this subtree
+            bound += least
+        return bound
+
+    def answer_to_list(self, answer):
         answer_list = []
         for row_id in answer:
             node_id,pci = self.row_to_nodeid_pci(row_id)
-            node_name = self.edgeTab.get_node_name(node_id)
             pci = pci % self.maxpci
             answer_list.append([node_id,pci])
-        return self.edgeTab.calculate_total_density(cellinfo=answer_list), answer_list
+        return answer_list
 
     def row_to_nodeid_pci(self, row_id):       
         if row_id < self.no_opt_nodecount:
@@ -323,32 +932,56 @@ class DLXOptimizer(object):
         return nodeid,pci
 
     def print_matrix(self, file=None):
+        # dense matrix, only for small tables, see export_matrix
         printable_mat = np.zeros((self.num_rows,self.num_columns))
-        for col_header in self.col_headers:
-            self.__fillmatrix(printable_mat, col_header)        
+        for row, col in self.iter_matrix_cells():
+            printable_mat[row][col] = 1
         if file is None:
             np.set_printoptions(threshold=np.inf)
             print(printable_mat)
         else:
             np.savetxt(file,printable_mat,fmt="%s",delimiter=',')
 
-    def save_answers(self,baseFileName):
-        for i, (indensity, cellinfo) in enumerate(self.solutions):
-            fileName = baseFileName + 'sol{}_ind{}.csv'.format(i, int(indensity*10000))
-            newcellinfo = [[self.edgeTab.get_node_name(node_id), pci % 3] for [node_id, pci] in cellinfo]
-            df = pd.DataFrame(newcellinfo)
-            df.columns= ['CellId','PSS']
-            df.to_csv(fileName,index=None)       
-        
+    def iter_matrix_cells(self):
+        """
+        Yield (row, col) of every cell in the matrix
+        """
+        for col_header in self.col_headers:
+            node = col_header.down
+            while(node != col_header):
+                yield node.row_header, node.col_header
+                node = node.down
+
+    def export_matrix(self, file, chunk_size=100000):
+        """
+        Save the matrix without making it dense. File ends with '.npz'
+        is saved as scipy csr matrix, otherwise the (row, col) of cells
+        are written as csv, chunk_size lines at a time.
+        """
+        if file.endswith('.npz'):
+            rows = array('i')
+            cols = array('i')
+            for row, col in self.iter_matrix_cells():
+                rows.append(row)
+                cols.append(col)
+            data   = np.ones(len(rows), dtype=np.int8)
+            matrix = sparse.coo_matrix((data, (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32))),
+                                       shape=(self.num_rows, self.num_columns))
+            sparse.save_npz(file, matrix.tocsr())
+        else:
+            with open(file, 'w') as f:
+                f.write('row,col\n')
+                lines = []
+                for row, col in self.iter_matrix_cells():
+                    lines.append('{},{}\n'.format(row, col))
+                    if len(lines) == chunk_size:
+                        f.writelines(lines)
+                        lines = []
+                f.writelines(lines)
+
     def print_info(self):
         print("maxpci: ",self.maxpci)
         print("nodecount: ",self.nodecount)        
         print("edgecount: ",self.edgecount) 
         print("num_columns: ",self.num_columns)
         print("num_rows: ",self.num_rows)
-        
-    def __fillmatrix(self, matrix, col_header):
-        node = col_header.down
-        while(node != col_header):
-            matrix[node.row_header][node.col_header] = 1
-            node = node.down
@@ -0,0 +1,190 @@
+from array import array
+
+import numpy as np
+
+from dlx import DLXOptimizer
+
+def typed_array(values):
+    """
+    Return array('i') of numpy int array, array('l') if it doesn't fit
+    """
+    typecode = 'i' if len(values) == 0 or values.max() < 2**31 else 'l'
+    return array(typecode, values.astype(typecode).tobytes())
+
+class ArrayDLXOptimizer(DLXOptimizer):
+    """
+    Array backed version of DLXOptimizer, the matrix is the same as the one
+    described in DLXOptimizer but no Node object is created for the cells.
+
+    Every row of the matrix has exactly one node column (the primary column)
+    and some edge columns, so instead of unlinking every cell of a removed row
+    vertically, a removed row is only marked as inactive and the size of its
+    node column is decreased. Removing a column costs O(rows in column)
+    rather than O(cells in rows of column).
+
+    The cells are kept in two CSR style typed arrays built with numpy
+
+        row_cols[row_start[row]:row_start[row+1]]
+                          columns of the row, the node column comes first
+        col_rows[col_start[col]:col_start[col+1]]
+                          rows of the column, in ascending row id
+        row_col[row]      node column of the row
+        row_active[row]   1 if the row is still in the matrix
+        left/right        double link of node column headers, root is the
+                          last element (index nodecount)
+        col_size[col]     rows left in node column, edge columns are not
+                          updated during search
+
+    Removed rows are pushed to self.trail, recover() must be called in the
+    reverse order of remove() to restore them.
+    """
+    def construct_matrix(self):
+        self.root       = self.nodecount
+        self.left       = [self.nodecount] + list(range(self.nodecount))
+        self.right      = list(range(1, self.nodecount + 1)) + [0]
+        self.row_active = bytearray(b'\x01') * self.num_rows
+        self.trail      = []       # removed rows
+        self.trail_pos  = []       # len(self.trail) before each remove()
+        self.col_headers = range(self.num_columns)
+
+        # numpy arrays are int32 while column ids fit
+        itype     = np.int32 if self.num_columns < 2**31 else np.int64
+
+        # node id and pci of each node column, no opt nodes come first
+        nodes     = self.edgeTab.node_dont_opt_ids + self.edgeTab.node_need_opt_ids
+        node_ids  = np.array([node_id for (node_id, pci) in nodes], dtype=itype)
+        # edge ids of node column i are edge_flat[edge_pos[i]:edge_pos[i]+degrees[i]]
+        edge_flat = self.edgeTab.node_edge_list
+        edge_pos  = self.edgeTab.node_edge_ptr[node_ids]
+        degrees   = (self.edgeTab.node_edge_ptr[node_ids + 1] - edge_pos).astype(itype)
+
+        # node column and pci of each row, row ids as in DLXOptimizer.add_row
+        counts  = np.full(self.nodecount, self.maxpci, dtype=itype)
+        counts[:self.no_opt_nodecount] = 1
+        row_col = np.repeat(np.arange(self.nodecount, dtype=itype), counts)
+        row_pci = np.tile(np.arange(self.maxpci, dtype=itype), self.opt_nodecount)
+        no_opt_pcis = np.array([pci for (node_id, pci) in self.edgeTab.node_dont_opt_ids], dtype=itype)
+        row_pci = np.concatenate((no_opt_pcis % self.maxpci, row_pci))
+
+        # columns of each row, node column then edge columns
+        row_len   = 1 + degrees[row_col]
+        row_start = np.concatenate(([0], np.cumsum(row_len, dtype=np.int64)))
+        row_cols  = np.empty(row_start[-1], dtype=itype)
+        row_cols[row_start[:-1]] = row_col
+        row_edges = row_len - 1
+        edge_rows = np.repeat(np.arange(self.num_rows, dtype=itype), row_edges)
+        # offset of each edge column in its row, node column excluded
+        offsets   = np.arange(len(edge_rows)) - np.repeat(np.cumsum(row_edges, dtype=np.int64) - row_edges, row_edges)
+        edges     = edge_flat[edge_pos[row_col[edge_rows]] + offsets]
+        row_cols[row_start[edge_rows] + 1 + offsets] = self.nodecount + edges * self.maxpci + row_pci[edge_rows]
+
+        # rows of each column, a stable sort keeps ascending row ids
+        col_size  = np.bincount(row_cols, minlength=self.num_columns)
+        col_start = np.concatenate(([0], np.cumsum(col_size, dtype=np.int64)))
+        del edge_rows, offsets, edges
+        col_rows  = np.repeat(np.arange(self.num_rows, dtype=itype), row_len)[np.argsort(row_cols, kind='stable')]
+
+        self.row_start  = typed_array(row_start)
+        self.row_cols   = typed_array(row_cols)
+        self.row_col    = typed_array(row_col)
+        self.col_start  = typed_array(col_start)
+        self.col_rows   = typed_array(col_rows)
+        self.col_size   = typed_array(col_size)
+
+    def choose_column(self):
+        col = self.right[self.root]
+        if col == self.root:
+            return None
+        elif self.col_size[col] == 0:
+            # no candicates left in column
+            return None
+        elif self.column_choice == 'first':
+            return col
+
+        # least rows left, then most edges, see DLXOptimizer.choose_column
+        col_size   = self.col_size
+        col_degree = self.col_degree
+        right      = self.right
+        chosen     = col
+        min_size   = col_size[col]
+        max_degree = col_degree[col]
+        col        = right[col]
+        while col != self.root:
+            size = col_size[col]
+            if size < min_size or (size == min_size and col_degree[col] > max_degree):
+                if size == 0:
+                    return None
+                chosen     = col
+                min_size   = size
+                max_degree = col_degree[col]
+            col = right[col]
+        return chosen
+
+    def remaining_columns(self):
+        cols = []
+        col  = self.right[self.root]
+        while col != self.root:
+            cols.append(col)
+            col = self.right[col]
+        return cols
+
+    def column_rows(self, col):
+        active = self.row_active
+        return [row for row in self.col_rows[self.col_start[col]:self.col_start[col + 1]] if active[row]]
+
+    def row_header(self, row):
+        return row
+
+    def cover_row(self, row):
+        for col in self.row_cols[self.row_start[row] + 1:self.row_start[row + 1]]:
+            self.remove(col)
+
+    def uncover_row(self, row):
+        for col in reversed(self.row_cols[self.row_start[row] + 1:self.row_start[row + 1]]):
+            self.recover(col)
+
+    def remove(self, col):
+        self.stats.covers += 1
+        if col < self.nodecount:
+            # remove column header
+            self.right[self.left[col]] = self.right[col]
+            self.left[self.right[col]] = self.left[col]
+
+        active   = self.row_active
+        col_size = self.col_size
+        row_col  = self.row_col
+        trail    = self.trail
+        class_size = self.col_class_size
+        self.trail_pos.append(len(trail))
+        for row in self.col_rows[self.col_start[col]:self.col_start[col + 1]]:
+            if active[row]:
+                active[row] = 0
+                col_size[row_col[row]] -= 1
+                if class_size is not None:
+                    class_size[self.row_class_col[row]] -= 1
+                trail.append(row)
+
+    def recover(self, col):
+        self.stats.uncovers += 1
+        active   = self.row_active
+        col_size = self.col_size
+        row_col  = self.row_col
+        trail    = self.trail
+        class_size = self.col_class_size
+        pos      = self.trail_pos.pop()
+        for row in trail[pos:]:
+            active[row] = 1
+            col_size[row_col[row]] += 1
+            if class_size is not None:
+                class_size[self.row_class_col[row]] += 1
+        del trail[pos:]
+
+        if col < self.nodecount:
+            # restore column header
+            self.right[self.left[col]] = col
+            self.left[self.right[col]] = col
+
+    def iter_matrix_cells(self):
+        for row in range(self.num_rows):
+            for col in self.row_cols[self.row_start[row]:self.row_start[row + 1]]:
+                yield row, col
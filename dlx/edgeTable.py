@@ -1,4 +1,5 @@
 from scipy import sparse
+from scipy.sparse import csgraph
 import numpy as np
 import pandas
 
@@ -24,6 +25,9 @@ class EdgeTable(object):
         If the node name is not found, the function will generate
         one new node id
         """
+        if self.node_name_id_dict is None:
+            # tables restored by from_arrays build it when first needed
+            self.node_name_id_dict = dict((node_name, i) for i, node_name in enumerate(self.node_id_name_list))
         node_id = self.node_name_id_dict.get(nodeName)
         is_new  = False
         if node_id is None and create_new == True:
@@ -52,28 +56,21 @@ class EdgeTable(object):
         """
         For given node id1 and id2, return edge id 
         """
+        if self.edge_id_dict is None:
+            self.edge_id_dict = dict(zip(zip(self.edge_src.tolist(), self.edge_dst.tolist()),
+                                         range(self.edge_count)))
         edge = [nodeId1, nodeId2]
         edge.sort()
-        edge = tuple(edge)
-        if edge in self.edge_id_list:
-            return self.edge_id_list.index(edge)
-        else:
-            return -1
+        return self.edge_id_dict.get(tuple(edge), -1)
 
     def get_edge_count(self):
         return self.edge_count
 
     def get_all_edge_ids(self, nodeId):  
         """
-        For given node Id, return all its edge Ids
+        For given node Id, return all its edge Ids in ascending order
         """ 
-        edge_ids = []
-        for edgeid, (nodeid1,nodeid2) in enumerate(self.edge_id_list):
-            if nodeId == nodeid1 or nodeId == nodeid2:
-                edge_ids.append(edgeid)
-        return edge_ids
-            #neighbor_node_ids = np.argwhere(self.edge_table[nodeId].toarray().flatten())         
-        #return [self.get_edge_id(nodeId,neighbor_node_id) for neighbor_node_id in neighbor_node_ids.flatten()]
+        return self.node_edge_list[self.node_edge_ptr[nodeId]:self.node_edge_ptr[nodeId+1]].tolist()
 
     def is_neighbor(self, nodeId1, nodeId2):
         return not self.edge_table[nodeId1, nodeId2] == 0.
@@ -85,9 +82,9 @@ class EdgeTable(object):
         print(self.edge_table.toarray())
 
     def print_edge_info(self):
-        print(self.edge_id_list)
+        print(list(zip(self.edge_src.tolist(), self.edge_dst.tolist())))
 
-    def construct_edge_matrix(self, cellInfo):        
+    def construct_edge_matrix(self, cellInfo, df=None, chunksize=None, header='infer'):        
         """ parse table info file, should be csv format
 
         table info file might looks like
@@ -98,121 +95,406 @@ class EdgeTable(object):
         ...
 
         After parsing the file, each node name will be assigned
-        one unique node id
+        one unique node id. df is the already parsed file if given.
+
+        If chunksize is given, the file is read chunksize lines at a time
+        and only lines of cells in cellInfo are kept, so memory used is
+        decided by the kept lines rather than the file. header=None reads
+        files without header line, such as integer cell id exports like
+        4673512,4673513,0.026106437
         """         
         self.node_id_name_list = []
         self.node_need_opt_ids = [] # [(id1, pci1), (id3, pci3) ...] 
         self.node_dont_opt_ids = [] # [(id2, pci2), (id4, pic4) ...]
         self.node_name_id_dict = {}
         self.node_count        = 0
-        self.edge_id_list      = [] # sorted tuple list, [(1,2),(1,3), ...]
+        self.edge_src          = None # numpy arrays of edge id -> nodeid1, nodeid2, density,
+        self.edge_dst          = None # edges are sorted (small id, large id) pairs
+        self.edge_values       = None
+        self.edge_id_dict      = None # {(1,2): 0, (1,3): 1, ...}, built by get_edge_id
+        self.node_edge_ptr     = None # edge ids of node i are node_edge_list[node_edge_ptr[i]:node_edge_ptr[i+1]]
+        self.node_edge_list    = None
         self.edge_count        = 0
         self.edge_table        = None
         self.cellinfo          = cellInfo
 
-        df                 = pandas.read_csv(self.fileName)      
-        validcells         = cellInfo["CellId"].values
-        lines              = df.values
-        sparse_matrix_row  = []
-        sparse_matrix_col  = []
-        sparse_matrix_data = []
-        for line in lines:
-            [central_node_name, neighbor_node_name, indenisity] = line
+        if chunksize is not None:
+            self.add_edges(*self.read_edges_chunked(chunksize, header))
+            return
+        if df is None:
+            df = pandas.read_csv(self.fileName, header=header)
+        self.add_edges(df.iloc[:,0].values, df.iloc[:,1].values, df.iloc[:,2].values)
+
+    def read_edges_chunked(self, chunksize, header='infer'):
+        """
+        Read table info file chunk by chunk, return (central node names,
+        neighbor node names, densities) of the lines whose cells are in
+        the cell info
+        """
+        validcells = pandas.Index(self.cellinfo["CellId"].values).unique()
+        centrals, neighbors, densities = [], [], []
+        reader = pandas.read_csv(self.fileName, header=header, usecols=[0,1,2],
+                                 chunksize=chunksize, encoding='utf-8-sig')
+        for chunk in reader:
+            central_ok  = validcells.get_indexer(chunk.iloc[:,0].values) >= 0
+            neighbor_ok = validcells.get_indexer(chunk.iloc[:,1].values) >= 0
             # central and neighbor node should be both in valid cells or neither
-            if central_node_name in validcells:
-                assert(neighbor_node_name in validcells)
-            else:
-                assert(neighbor_node_name not in validcells)
-                continue
-            
-            # from here, central_node and neighbor_node should has
-            central_node_id, is_new = self.get_node_id(central_node_name, True)
-            if is_new:
-                self.__update_node_opt_id_list(central_node_id, central_node_name)
-            neighbor_node_id, is_new = self.get_node_id(neighbor_node_name, True)
-            if is_new:
-                self.__update_node_opt_id_list(neighbor_node_id, neighbor_node_name)
-
-            edge = [central_node_id,neighbor_node_id]
-            edge.sort()
-            self.edge_id_list.append(tuple(edge))
-            sparse_matrix_row.append(central_node_id)
-            sparse_matrix_col.append(neighbor_node_id)
-            sparse_matrix_data.append(float(indenisity))
-
-        self.edge_id_list = list(set(self.edge_id_list))
-        self.edge_id_list.sort()
-        self.edge_count = len(self.edge_id_list)
+            assert((central_ok == neighbor_ok).all())
+            centrals.append(chunk.iloc[:,0].values[central_ok])
+            neighbors.append(chunk.iloc[:,1].values[central_ok])
+            densities.append(chunk.iloc[:,2].values[central_ok].astype(float))
+        if centrals == []:
+            return np.array([]), np.array([]), np.array([])
+        return np.concatenate(centrals), np.concatenate(neighbors), np.concatenate(densities)
+
+    def add_edges(self, central_node_names, neighbor_node_names, densities):
+        """
+        Build node ids, edge ids and the sparse matrix from the columns
+        of table info file. Lines whose cells are not in the cell info
+        are dropped, node ids are assigned in the order node names
+        appear, central node first in each line.
+        """
+        validcells  = self.cellinfo["CellId"].values
+        central_ok  = pandas.Series(central_node_names).isin(validcells).values
+        neighbor_ok = pandas.Series(neighbor_node_names).isin(validcells).values
+        # central and neighbor node should be both in valid cells or neither
+        assert((central_ok == neighbor_ok).all())
+
+        # node ids of [central, neighbor] of each kept line
+        names = np.column_stack((central_node_names[central_ok], neighbor_node_names[central_ok])).ravel()
+        codes, uniques = pandas.factorize(names, sort=False)
+        codes = codes.reshape(-1, 2)
+        for node_name in uniques.tolist():
+            self.get_node_id(node_name, True)
+        self.__update_node_opt_id_list(uniques)
+
+        # edges are sorted (small id, large id) pairs without duplicates
+        if len(codes) > 0:
+            edges = np.unique(np.sort(codes, axis=1), axis=0)
+        else:
+            edges = np.zeros((0, 2), dtype=np.int64)
+        self.edge_src   = edges[:,0].astype(np.int64)
+        self.edge_dst   = edges[:,1].astype(np.int64)
+        self.edge_count = len(edges)
 
         assert(self.node_count == len(self.node_dont_opt_ids) + len(self.node_need_opt_ids))
         
-        matrix=sparse.coo_matrix((sparse_matrix_data,(sparse_matrix_row,sparse_matrix_col)), shape=(self.node_count, self.node_count))
+        data   = np.asarray(densities[central_ok], dtype=float)
+        matrix = sparse.coo_matrix((data,(codes[:,0],codes[:,1])), shape=(self.node_count, self.node_count))
         self.edge_table = matrix.tocsr()
+        self.__build_edge_index()
         
-    def __update_node_opt_id_list(self, node_id, node_name):
-        _,_,pci,_,pflag = self.cellinfo[self.cellinfo['CellId'] == node_name].values[0]
-        if pflag == 1:
-            self.node_need_opt_ids.append((node_id,pci))
+    def get_components(self):
+        """
+        Split nodes into connected components, an edge in either direction
+        connects two nodes. Return node ids of each component, node ids
+        are in ascending order, [[id1, id3, ...], [id2, ...], ...]
+        """
+        if self.node_count == 0:
+            return []
+        count, labels = csgraph.connected_components(self.edge_table, directed=True, connection='weak')
+        order  = np.argsort(labels, kind='stable')
+        splits = np.cumsum(np.bincount(labels, minlength=count))[:-1]
+        return [component.tolist() for component in np.split(order, splits)]
+
+    def sub_table(self, node_ids):
+        """
+        Return a new EdgeTable only contains given nodes and the edges
+        between them. Node id i of the new table is node_ids[i] of this
+        table, node_ids should be in ascending order.
+        """
+        # new id of each node of this table, -1 if not in node_ids
+        local = np.full(self.node_count, -1, dtype=np.int64)
+        local[node_ids] = np.arange(len(node_ids))
+        local_ids = local.tolist()
+        kept  = (local[self.edge_src] >= 0) & (local[self.edge_dst] >= 0)
+
+        tab = EdgeTable(self.fileName)
+        tab.node_id_name_list = [self.node_id_name_list[node_id] for node_id in node_ids]
+        tab.node_name_id_dict = None
+        tab.node_count        = len(node_ids)
+        tab.node_need_opt_ids = [(local_ids[node_id], pci) for (node_id, pci) in self.node_need_opt_ids if local_ids[node_id] >= 0]
+        tab.node_dont_opt_ids = [(local_ids[node_id], pci) for (node_id, pci) in self.node_dont_opt_ids if local_ids[node_id] >= 0]
+        tab.edge_src          = local[self.edge_src[kept]]
+        tab.edge_dst          = local[self.edge_dst[kept]]
+        tab.edge_count        = len(tab.edge_src)
+        tab.edge_table        = self.edge_table[node_ids][:, node_ids].tocsr()
+        tab.cellinfo          = self.cellinfo
+        tab.__build_edge_index()
+        return tab
+
+    def sparsify(self, threshold=None, top_k=None):
+        """
+        Return (new table, report) without the weak edges. An edge is
+        dropped if its density is less than threshold, or if it is not
+        one of the top_k strongest edges of either of its nodes. Nodes
+        are all kept, edges of a node to itself are never dropped.
+
+        Dropped neighbors may share one pci, and the density of any plan
+        on the new table differs from the density on this table by at
+        most report['total_dropped']. report also gives number of dropped
+        edges, the strongest dropped edge and the most density dropped
+        around one node.
+        """
+        values = self.edge_values
+        drop   = np.zeros(self.edge_count, dtype=bool)
+        if threshold is not None:
+            drop |= values < threshold
+        if top_k is not None:
+            # rank of each edge among the edges of each of its two nodes
+            nodes  = np.concatenate((self.edge_src, self.edge_dst))
+            edges  = np.concatenate((np.arange(self.edge_count), np.arange(self.edge_count)))
+            order  = np.lexsort((edges, -values[edges], nodes))
+            starts = np.searchsorted(nodes[order], nodes[order], side='left')
+            ranks  = np.arange(len(order)) - starts
+            in_top = np.zeros(self.edge_count, dtype=bool)
+            in_top[edges[order][ranks < top_k]] = True
+            drop |= ~in_top
+        drop &= self.edge_src != self.edge_dst
+
+        node_dropped = np.bincount(np.concatenate((self.edge_src[drop], self.edge_dst[drop])),
+                                   weights=np.concatenate((values[drop], values[drop])),
+                                   minlength=self.node_count)
+        report = {'dropped_edges'    : int(drop.sum()),
+                  'kept_edges'       : int(self.edge_count - drop.sum()),
+                  'max_dropped'      : float(values[drop].max()) if drop.any() else 0.,
+                  'total_dropped'    : float(values[drop].sum()),
+                  'max_node_dropped' : float(node_dropped.max()) if self.node_count > 0 else 0.}
+
+        return self.keep_edges(~drop), report
+
+    def keep_edges(self, kept):
+        """
+        Return a new table with all nodes of this table and only the
+        edges whose kept[edgeid] is True, both directions of an edge are
+        kept in the matrix
+        """
+        matrix   = self.edge_table.tocoo()
+        row, col = matrix.row.astype(np.int64), matrix.col.astype(np.int64)
+        kept_keys = self.edge_src[kept] * self.node_count + self.edge_dst[kept]
+        entries  = np.isin(np.minimum(row, col) * self.node_count + np.maximum(row, col), kept_keys)
+
+        tab = EdgeTable(self.fileName)
+        tab.node_id_name_list = self.node_id_name_list
+        tab.node_name_id_dict = self.node_name_id_dict
+        tab.node_count        = self.node_count
+        tab.node_need_opt_ids = list(self.node_need_opt_ids)
+        tab.node_dont_opt_ids = list(self.node_dont_opt_ids)
+        tab.edge_src          = self.edge_src[kept]
+        tab.edge_dst          = self.edge_dst[kept]
+        tab.edge_count        = len(tab.edge_src)
+        tab.edge_table        = sparse.csr_matrix((matrix.data[entries], (row[entries], col[entries])),
+                                                  shape=(self.node_count, self.node_count))
+        tab.cellinfo          = self.cellinfo
+        tab.__build_edge_index()
+        return tab
+
+    def to_arrays(self):
+        """
+        Return the table as a dict of numpy arrays, which is much cheaper
+        to pickle than the table itself, use from_arrays to restore it.
+        The csr matrix and the edge index are included so that they are
+        not built again.
+        """
+        return {
+            'node_names'     : np.array(self.node_id_name_list),
+            'opt_ids'        : np.array([node_id for (node_id, pci) in self.node_need_opt_ids], dtype=np.int32),
+            'opt_pcis'       : np.array([pci for (node_id, pci) in self.node_need_opt_ids], dtype=np.int64),
+            'no_opt_ids'     : np.array([node_id for (node_id, pci) in self.node_dont_opt_ids], dtype=np.int32),
+            'no_opt_pcis'    : np.array([pci for (node_id, pci) in self.node_dont_opt_ids], dtype=np.int64),
+            'edge_src'       : self.edge_src,
+            'edge_dst'       : self.edge_dst,
+            'edge_values'    : self.edge_values,
+            'node_edge_ptr'  : self.node_edge_ptr,
+            'node_edge_list' : self.node_edge_list,
+            'matrix_indptr'  : self.edge_table.indptr,
+            'matrix_indices' : self.edge_table.indices,
+            'matrix_data'    : self.edge_table.data,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, fileName=None):
+        """
+        Restore table from the arrays returned by to_arrays, the table
+        has no cell info. The arrays are used as they are, memory mapped
+        arrays are not read until needed.
+        """
+        tab = cls(fileName)
+        tab.node_id_name_list = arrays['node_names']
+        tab.node_name_id_dict = None
+        tab.node_count        = len(tab.node_id_name_list)
+        tab.node_need_opt_ids = list(zip(arrays['opt_ids'].tolist(), arrays['opt_pcis'].tolist()))
+        tab.node_dont_opt_ids = list(zip(arrays['no_opt_ids'].tolist(), arrays['no_opt_pcis'].tolist()))
+        tab.edge_src          = arrays['edge_src']
+        tab.edge_dst          = arrays['edge_dst']
+        tab.edge_values       = arrays['edge_values']
+        tab.edge_count        = len(tab.edge_src)
+        tab.edge_id_dict      = None
+        tab.node_edge_ptr     = arrays['node_edge_ptr']
+        tab.node_edge_list    = arrays['node_edge_list']
+        tab.edge_table        = sparse.csr_matrix((arrays['matrix_data'], arrays['matrix_indices'], arrays['matrix_indptr']),
+                                                  shape=(tab.node_count, tab.node_count))
+        tab.cellinfo          = None
+        return tab
+
+    def __build_edge_index(self):
+        # edge ids per node, edge ids of each node are in ascending order,
+        # an edge of a node to itself is counted once
+        edge_ids = np.arange(self.edge_count)
+        other    = self.edge_src != self.edge_dst
+        nodes    = np.concatenate((self.edge_src, self.edge_dst[other]))
+        edge_ids = np.concatenate((edge_ids, edge_ids[other]))
+        self.node_edge_list = edge_ids[np.lexsort((edge_ids, nodes))]
+        self.node_edge_ptr  = np.concatenate(([0], np.cumsum(np.bincount(nodes, minlength=self.node_count))))
+        self.edge_id_dict   = None
+
+        # edge density for vectorized density calculation
+        if self.edge_count == 0:
+            self.edge_values = np.zeros(0)
         else:
-            self.node_dont_opt_ids.append((node_id,pci))
-    
-    def calculate_total_density(self,cellinfo=None,debug=False):
-        if cellinfo is None:
-            cellinfo = self.cellinfo[['CellId','PCI']].values
-
-        total_density = 0
-        tmp_cell_info = []
-        for [node_name, pci] in cellinfo:
-            if type(node_name) == str:
-                node_id, _ = self.get_node_id(node_name)
-                if node_id is None:
-                    continue
+            self.edge_values = np.asarray(self.edge_table[self.edge_src, self.edge_dst]).ravel()
+
+    def __update_node_opt_id_list(self, node_names):
+        # node_names are names of node id 0, 1, ..., look up all of
+        # them in cell info at once, first one is used if cell id is
+        # duplicated
+        cell_ids  = pandas.Index(self.cellinfo['CellId'].values)
+        rows      = np.arange(len(cell_ids))
+        if not cell_ids.is_unique:
+            first    = ~cell_ids.duplicated()
+            cell_ids = cell_ids[first]
+            rows     = rows[first]
+        cell_rows = rows[cell_ids.get_indexer(node_names)]
+        pcis      = self.cellinfo['PCI'].values[cell_rows].tolist()
+        pflags    = self.cellinfo['PlanFlag'].values[cell_rows].tolist()
+        for node_id, (pci, pflag) in enumerate(zip(pcis, pflags)):
+            if pflag == 1:
+                self.node_need_opt_ids.append((node_id,pci))
             else:
-                node_id = node_name
-            tmp_cell_info.append([node_id,pci])
-        tmp_cell_info.sort()
-
-        for (nodeid1,nodeid2) in self.edge_id_list:
-            [id1, pci1] = tmp_cell_info[nodeid1]
-            assert(id1 == nodeid1)
-            [id2, pci2] = tmp_cell_info[nodeid2]
-            assert(id2 == nodeid2)
-            if (pci1 % 3) == (pci2 % 3):
-                if debug:
-                    print("nodeid(name)={}({}),pci={} conflicts nodeid(name)={}({}),pci={}".format(nodeid1,self.get_node_name(nodeid1),pci1,
-                                                                          nodeid2,self.get_node_name(nodeid2),pci2)) 
-                total_density += self.get_value(id1,id2)
-
-        return total_density
+                self.node_dont_opt_ids.append((node_id,pci))
+    
+    def calculate_total_density(self,cellinfo=None,debug=False,by_node_id=False):
+        pcis = self.get_pci_array(cellinfo, by_node_id)
+        conflicts = (pcis[self.edge_src] % 3) == (pcis[self.edge_dst] % 3)
+        if debug:
+            for edgeid in np.flatnonzero(conflicts):
+                nodeid1, nodeid2 = self.edge_src[edgeid], self.edge_dst[edgeid]
+                print("nodeid(name)={}({}),pci={} conflicts nodeid(name)={}({}),pci={}".format(nodeid1,self.get_node_name(nodeid1),pcis[nodeid1],
+                                                                      nodeid2,self.get_node_name(nodeid2),pcis[nodeid2]))
+        return self.edge_values[conflicts].sum()
+
+    def calculate_density_batch(self, pci_plans):
+        """
+        Density of many plans at once, pci_plans is a 2-D array and
+        pci_plans[i, nodeid] is pci of the node in plan i
+        """
+        pci_classes = np.asarray(pci_plans) % 3
+        conflicts   = pci_classes[:, self.edge_src] == pci_classes[:, self.edge_dst]
+        return conflicts.dot(self.edge_values)
+
+    def get_pci_array(self, cellinfo=None, by_node_id=False):
+        """
+        Return pci of each node as an array indexed by node id, cellinfo is
+        [[node_name, pci], ...] and the pci of the nodes in cell info are
+        used if it is None. If by_node_id is True cellinfo is
+        [[node_id, pci], ...] as answers of the optimizers. Every node
+        should have one pci, names not in the table are skipped.
+        """
+        if cellinfo is None and self.cellinfo is None:
+            # table without cell info, use pci of the nodes
+            cellinfo   = self.node_need_opt_ids + self.node_dont_opt_ids
+            by_node_id = True
+        elif cellinfo is None:
+            cellinfo   = self.cellinfo[['CellId','PCI']].values.tolist()
+            by_node_id = False
+
+        node_names = [node_name for [node_name, pci] in cellinfo]
+        cell_pcis  = np.array([pci for [node_name, pci] in cellinfo], dtype=np.int64)
+        if by_node_id:
+            node_ids = np.array(node_names, dtype=np.int64)
+        else:
+            # names may be integer CellIds, never take them as node ids
+            node_ids = pandas.Index(self.node_id_name_list).get_indexer(node_names)
+            kept     = node_ids >= 0
+            node_ids, cell_pcis = node_ids[kept], cell_pcis[kept]
+
+        pcis     = np.zeros(self.node_count, dtype=np.int64)
+        assigned = np.zeros(self.node_count, dtype=bool)
+        pcis[node_ids]     = cell_pcis
+        assigned[node_ids] = True
+        assert(assigned.all())
+        return pcis
+
+    def get_adjacency(self):
+        """
+        Return symmetric 0/1 CSR matrix of neighbors, node itself excluded
+        """
+        matrix = self.edge_table.tocoo()
+        kept   = (matrix.row != matrix.col) & (matrix.data != 0)
+        row, col = matrix.row[kept], matrix.col[kept]
+        adjacency = sparse.coo_matrix((np.ones(2 * len(row), dtype=np.int32),
+                                       (np.concatenate((row, col)), np.concatenate((col, row)))),
+                                      shape=matrix.shape).tocsr()
+        adjacency.data[:] = 1
+        return adjacency
+
+    def get_triangle_counts(self, adjacency=None):
+        """
+        Return number of triangles each node is in, as an array
+        indexed by node id
+        """
+        if adjacency is None:
+            adjacency = self.get_adjacency()
+        # (A * A)[i, j] is number of common neighbors of i and j
+        common = adjacency.dot(adjacency).multiply(adjacency)
+        return np.asarray(common.sum(axis=1)).ravel() // 2
+
+    def find_clique(self, node_ids, adjacency, triangles, max_seeds=10):
+        """
+        Greedy clique search within node_ids, started from the max_seeds
+        nodes in most triangles. Each step adds the candidate in most
+        triangles, candidates are neighbors of all nodes of the clique.
+        Return the largest clique found as a list of node ids.
+        """
+        indptr, indices = adjacency.indptr, adjacency.indices
+        seeds = sorted(node_ids, key=lambda node_id: -triangles[node_id])[:max_seeds]
+        best  = seeds[:1]
+        for seed in seeds:
+            clique     = [seed]
+            candidates = set(indices[indptr[seed]:indptr[seed + 1]].tolist())
+            while candidates:
+                node_id = max(candidates, key=lambda candidate: (triangles[candidate], -candidate))
+                clique.append(node_id)
+                candidates.intersection_update(indices[indptr[node_id]:indptr[node_id + 1]].tolist())
+            if len(clique) > len(best):
+                best = clique
+        return sorted(best)
+
+    def get_component_pci_bounds(self):
+        """
+        Lower bound of pci count of each connected component, in the
+        order of get_components. Nodes of a clique are neighbors of each
+        other and all need different pcis, so the size of a clique found
+        by find_clique is a lower bound. Return [(bound, clique), ...].
+        """
+        adjacency = self.get_adjacency()
+        triangles = self.get_triangle_counts(adjacency)
+        bounds    = []
+        for node_ids in self.get_components():
+            clique = self.find_clique(node_ids, adjacency, triangles)
+            bounds.append((len(clique), clique))
+        return bounds
 
     def get_pci_counts(self):
-        # if one node's neighbor's neighbor contains itself,
-        # it means these three nodes connected to each other.
-        # In this case, at least we need 3 different pci to 
-        # make sure they didn't impact each other. This function
-        # is to find the least different pci we needed for the 
-        # whole network
-        neighbor_info = []
-        for i in range(self.node_count):
-            neighbor_info.append(set())
-        
-        for (nodeid1,nodeid2) in self.edge_id_list:
-            neighbor_info[nodeid1].add(nodeid2)
-            neighbor_info[nodeid2].add(nodeid1)
-        
+        # the least different pci we needed for the whole network
+        # is at least the size of the largest clique, since nodes
+        # of a clique are neighbors of each other. Return the bound
+        # and the nodes of the clique.
         min_pci_counts = 1
-        min_pci_nodes = []
-        for nodeid in range(self.node_count):
-            pci_counts = 1
-            pci_nodes  = [nodeid]
-            for neighbor_id in neighbor_info[nodeid]:
-                for neighbor_neighbor_id in neighbor_info[neighbor_id]:
-                    if nodeid in neighbor_info[neighbor_neighbor_id]:
-                        pci_counts += 1
-                        pci_nodes.append(neighbor_id)
-                        break
+        min_pci_nodes  = []
+        for pci_counts, pci_nodes in self.get_component_pci_bounds():
             if pci_counts > min_pci_counts:
                 min_pci_counts = pci_counts
-                min_pci_nodes = pci_nodes
+                min_pci_nodes  = pci_nodes
 
         return min_pci_counts,min_pci_nodes
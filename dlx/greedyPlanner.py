@@ -0,0 +1,114 @@
+import heapq
+
+import numpy as np
+from scipy import sparse
+
+from planner import Planner
+
+class GreedyPlanner(Planner):
+    """
+    Weighted DSatur plan, a fast fallback when the edge table is too large
+    to be searched and the warm start of DLXOptimizer.
+
+    Opt nodes take pcis one by one, the next node is the one whose
+    neighbors already use most different pcis, ties go to the node with
+    more density to its neighbors. The node takes the pci not used by any
+    neighbor with least density to the neighbors of same class (pci % 3).
+    The constraint of DLXOptimizer is kept, no opt nodes keep
+    origpci % maxpci, so the plan is also a valid answer of the dlx
+    matrix. There is no solution if a node has no pci left.
+    """
+    def __init__(self, edgeTab, maxpci):
+        # basic info
+        self.edgeTab          = edgeTab
+        self.maxpci           = maxpci
+        self.nodecount        = edgeTab.get_node_count()
+        self.edgecount        = edgeTab.get_edge_count()
+
+        # answer info
+        self.solutions        = []      # [(indensity, [[nodeid,pci],...])]
+        self.num_solution     = 1
+        self.optimal          = False   # never proved
+
+        # neighbors of node i are neighbor_ids[indptr[i]:indptr[i+1]], with
+        # density in neighbor_values, node_weight is density to all neighbors
+        kept    = edgeTab.edge_src != edgeTab.edge_dst
+        src     = edgeTab.edge_src[kept]
+        dst     = edgeTab.edge_dst[kept]
+        values  = edgeTab.edge_values[kept]
+        matrix  = sparse.coo_matrix((np.concatenate((values, values)),
+                                     (np.concatenate((src, dst)), np.concatenate((dst, src)))),
+                                    shape=(self.nodecount, self.nodecount)).tocsr()
+        self.indptr           = matrix.indptr.tolist()
+        self.neighbor_ids     = matrix.indices.tolist()
+        self.neighbor_values  = matrix.data.tolist()
+        self.node_weight      = np.asarray(matrix.sum(axis=1)).ravel().tolist()
+
+    def find_answers(self):
+        self.plan()
+
+        if len(self.solutions) == 0:
+            print("No answer found")
+        else:
+            self.print_solutions(detailed=True)
+
+    def plan(self):
+        """
+        Return pci of each node, None if no plan is found
+        """
+        self.solutions = []
+        pcis          = [-1] * self.nodecount
+        neighbor_pcis = [set() for i in range(self.nodecount)]     # pcis used by neighbors
+        class_density = [[0., 0., 0.] for i in range(self.nodecount)]
+
+        indptr, neighbor_ids, neighbor_values = self.indptr, self.neighbor_ids, self.neighbor_values
+
+        def assign(node_id, pci):
+            pcis[node_id] = pci
+            pci_class = pci % 3
+            for i in range(indptr[node_id], indptr[node_id + 1]):
+                neighbor_id = neighbor_ids[i]
+                neighbor_pcis[neighbor_id].add(pci)
+                class_density[neighbor_id][pci_class] += neighbor_values[i]
+
+        for (node_id, pci) in self.edgeTab.node_dont_opt_ids:
+            assign(node_id, pci % self.maxpci)
+        for (node_id, pci) in self.edgeTab.node_dont_opt_ids:
+            if pci % self.maxpci in neighbor_pcis[node_id]:
+                # two no opt neighbors use same pci
+                return None
+
+        # (-saturation, -weight, node id), entries with old saturation are skipped
+        heap = [(-len(neighbor_pcis[node_id]), -self.node_weight[node_id], node_id)
+                for (node_id, pci) in self.edgeTab.node_need_opt_ids]
+        heapq.heapify(heap)
+        while heap:
+            saturation, weight, node_id = heapq.heappop(heap)
+            if pcis[node_id] >= 0 or -saturation != len(neighbor_pcis[node_id]):
+                continue
+            # least pci left of each class, the one of the cheapest class is taken
+            best_pci = -1
+            used     = neighbor_pcis[node_id]
+            density  = class_density[node_id]
+            for pci_class in range(3):
+                for pci in range(pci_class, self.maxpci, 3):
+                    if pci not in used:
+                        if best_pci < 0 or (density[pci_class], pci) < (density[best_pci % 3], best_pci):
+                            best_pci = pci
+                        break
+            if best_pci < 0:
+                return None
+            assign(node_id, best_pci)
+            for neighbor_id in neighbor_ids[indptr[node_id]:indptr[node_id + 1]]:
+                if pcis[neighbor_id] < 0:
+                    heapq.heappush(heap, (-len(neighbor_pcis[neighbor_id]), -self.node_weight[neighbor_id], neighbor_id))
+
+        indensity = float(self.edgeTab.calculate_density_batch([pcis])[0])
+        self.solutions = [(indensity, [[node_id, pci] for node_id, pci in enumerate(pcis)])]
+        return pcis
+
+    def print_info(self):
+        print("maxpci: ",self.maxpci)
+        print("nodecount: ",self.nodecount)
+        print("edgecount: ",self.edgecount)
+        print("opt nodecount: ",self.edgeTab.get_opt_node_count())
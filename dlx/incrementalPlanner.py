@@ -0,0 +1,194 @@
+import numpy as np
+import pandas
+
+from dlxArray import ArrayDLXOptimizer
+from componentOptimizer import ComponentOptimizer
+from planner import Planner
+
+def changed_cells(oldCellInfo, newCellInfo):
+    """
+    Return CellIds which are new or whose PCI, EARFCN or PlanFlag
+    changed between two CellInfo
+    """
+    columns = ['PCI', 'EARFCN', 'PlanFlag']
+    old = oldCellInfo.cells[columns]
+    new = newCellInfo.cells[columns]
+    merged = new.join(old, how='left', rsuffix='_old')
+    changed = np.zeros(len(merged), dtype=bool)
+    for column in columns:
+        changed |= (merged[column] != merged[column + '_old']).values
+    return set(merged.index[changed].tolist())
+
+def changed_edge_cells(oldTabFileName, newTabFileName):
+    """
+    Return cell names of the table info lines which are added, removed
+    or whose density changed between two table info files
+    """
+    old = pandas.read_csv(oldTabFileName)
+    new = pandas.read_csv(newTabFileName)
+    old.columns = new.columns = ['CellId', 'CellIdNc', 'intensity']
+    merged  = new.merge(old, on=['CellId', 'CellIdNc'], how='outer', suffixes=('', '_old'))
+    changed = merged[merged['intensity'] != merged['intensity_old']]
+    return set(changed['CellId'].tolist()) | set(changed['CellIdNc'].tolist())
+
+class IncrementalPlanner(Planner):
+    """
+    Re-optimize a previous solution when only a few cells changed.
+
+    edgeTab is built from the new cell info and table info, solutionFile
+    is one file written by save_answers of the previous run. The changed
+    cells and their neighbors within hops are reopened, the other opt
+    nodes are pinned to the pss of the previous solution as no opt nodes.
+    Opt nodes not found in the solution file are always reopened.
+
+    Only the reopened nodes and their pinned neighbors are searched,
+    edges between two pinned nodes are dropped since their density is
+    fixed. The search is warm started with a greedy plan. The solutions
+    are plans of the whole edge table. The previous plan is kept as one
+    of the solutions when every reopened node can still take a pci of
+    its previous pss, the result is then never worse than the previous
+    plan.
+    """
+    def __init__(self, edgeTab, maxpci, solutionFile, changedCells, hops=1, optimizer=ArrayDLXOptimizer):
+        self.edgeTab          = edgeTab
+        self.maxpci           = maxpci
+        self.optimizer        = optimizer
+        self.hops             = hops
+        self.prev_pss         = self.read_solution(solutionFile)
+        self.changed_cells    = set(changedCells)
+        self.open_nodes       = []      # reopened opt node ids
+
+        self.init_options()             # passed to ComponentOptimizer
+        self.warm_start       = True
+        self.time_budget      = None    # seconds, stop searching after it if not None
+        self.timed_out        = False
+
+        # answer info
+        self.solutions        = []      # [(indensity, [[nodeid,pci],...])]
+        self.optimal          = False
+
+    def read_solution(self, solutionFile):
+        """
+        Return {node_id: pss} of the nodes in the solution file
+        """
+        df = pandas.read_csv(solutionFile)
+        prev_pss = {}
+        for cell_id, pss in zip(df['CellId'].tolist(), df['PSS'].tolist()):
+            node_id, _ = self.edgeTab.get_node_id(cell_id)
+            if node_id is not None:
+                prev_pss[node_id] = pss
+        return prev_pss
+
+    def get_neighborhood(self, node_ids):
+        """
+        Return node ids within self.hops of the given nodes, in
+        ascending order
+        """
+        matrix = self.edgeTab.edge_table
+        matrix = ((matrix + matrix.T) != 0).astype(np.int8).tocsr()
+        reached = np.zeros(self.edgeTab.get_node_count(), dtype=bool)
+        reached[list(node_ids)] = True
+        for i in range(self.hops):
+            reached = reached | (matrix.dot(reached.astype(np.int8)) != 0)
+        return np.flatnonzero(reached).tolist()
+
+    def construct_sub_table(self):
+        """
+        Return (sub table, node ids of sub table, pci of every node)
+        where pci is the previous plan (pci % maxpci as DLXOptimizer),
+        reopened nodes are -1
+        """
+        changed   = [node_id for node_id in range(self.edgeTab.get_node_count())
+                     if self.edgeTab.get_node_name(node_id) in self.changed_cells
+                     or node_id not in self.prev_pss]
+        reopened  = set(self.get_neighborhood(changed)) if changed != [] else set()
+        opt_pcis  = dict(self.edgeTab.node_need_opt_ids)
+        self.open_nodes = sorted(reopened.intersection(opt_pcis))
+
+        pcis = self.edgeTab.get_pci_array(self.edgeTab.node_dont_opt_ids
+                                          + [(node_id, self.prev_pss.get(node_id, -1)) for node_id in opt_pcis],
+                                          by_node_id=True) % self.maxpci
+        pcis[self.open_nodes] = -1
+
+        # reopened nodes and their neighbors
+        is_open  = np.zeros(self.edgeTab.get_node_count(), dtype=bool)
+        is_open[self.open_nodes] = True
+        src, dst = self.edgeTab.edge_src, self.edgeTab.edge_dst
+        kept     = is_open[src] | is_open[dst]
+        node_ids = np.union1d(src[kept], dst[kept])
+        node_ids = np.union1d(node_ids, self.open_nodes).astype(np.int64).tolist()
+
+        sub      = self.edgeTab.sub_table(node_ids)
+        local    = np.array(node_ids, dtype=np.int64)
+        sub_open = is_open[local]
+        sub_pcis = pcis[local]
+        sub.node_need_opt_ids = list(zip(np.flatnonzero(sub_open).tolist(),
+                                         [opt_pcis[node_id] for node_id in local[sub_open].tolist()]))
+        sub.node_dont_opt_ids = list(zip(np.flatnonzero(~sub_open).tolist(), sub_pcis[~sub_open].tolist()))
+        # pcis of pinned nodes are the previous plan, not the cell info
+        sub.cellinfo = None
+
+        # drop edges between two pinned nodes
+        sub = sub.keep_edges(sub_open[sub.edge_src] | sub_open[sub.edge_dst])
+        return sub, node_ids, pcis
+
+    def get_previous_plan(self, pcis):
+        """
+        Return the previous plan of the whole edge table, None if it is
+        not valid any more. Solution files only keep pss, every reopened
+        node takes the least pci of its previous pss not used by any
+        neighbor, the plan is not valid if a node has no such pci or was
+        not in the solution file.
+        """
+        plan   = pcis.copy()
+        matrix = self.edgeTab.edge_table
+        matrix = (matrix + matrix.T).tocsr()
+        for node_id in self.open_nodes:
+            if node_id not in self.prev_pss:
+                return None
+            used = set(plan[matrix.indices[matrix.indptr[node_id]:matrix.indptr[node_id + 1]]].tolist())
+            free = [pci for pci in range(self.prev_pss[node_id] % 3, self.maxpci, 3) if pci not in used]
+            if free == []:
+                return None
+            plan[node_id] = free[0]
+        return plan
+
+    def find_answers(self):
+        sub, node_ids, pcis = self.construct_sub_table()
+        planner = ComponentOptimizer(sub, self.maxpci, self.optimizer)
+        for name, value in self.get_options().items():
+            setattr(planner, name, value)
+        deadline = self.get_deadline()
+        planner.merge_results(planner.optimize_component(ids, deadline) for ids in planner.components)
+        self.optimal   = planner.optimal
+        self.timed_out = planner.timed_out
+
+        # put the reopened nodes back into the whole plan
+        plans = []
+        for indensity, cellinfo in planner.solutions:
+            plan = pcis.copy()
+            for node_id, pci in cellinfo:
+                plan[node_ids[node_id]] = pci
+            plans.append(plan)
+        prev_plan = self.get_previous_plan(pcis)
+        if prev_plan is not None:
+            plans.append(prev_plan)
+        self.solutions = []
+        if plans != []:
+            densities = self.edgeTab.calculate_density_batch(plans)
+            for indensity, plan in zip(densities.tolist(), plans):
+                self.solutions.append((indensity, [[node_id, pci] for node_id, pci in enumerate(plan.tolist())]))
+            self.solutions.sort(key=lambda solution: solution[0])
+            self.solutions = self.solutions[:self.num_solution]
+
+        if len(self.solutions) == 0:
+            print("No answer found")
+        else:
+            self.print_solutions(detailed=True)
+
+    def print_info(self):
+        print("maxpci: ",self.maxpci)
+        print("nodecount: ",self.edgeTab.get_node_count())
+        print("edgecount: ",self.edgeTab.get_edge_count())
+        print("changed cells: ",len(self.changed_cells))
+        print("reopened nodecount: ",len(self.open_nodes))
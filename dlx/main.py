@@ -1,6 +1,8 @@
 from edgeTable import EdgeTable
 from dlx import DLXOptimizer
+from dlxArray import ArrayDLXOptimizer
 from cellInfo import CellInfo
+from planCache import PlanCache
 
 import time
 
@@ -11,7 +13,7 @@ pci = 15
 #pci = 9
 
 # read file
-start_ts = time.clock()
+start_ts = time.perf_counter()
 cellinfo = CellInfo("data/eRANO_CellInfo_data1.csv")
 tab = EdgeTable("data/eRANO_IntTabInfo_data1.csv")
 
@@ -20,18 +22,26 @@ tab = EdgeTable("data/eRANO_IntTabInfo_data1.csv")
 
 cell = cellinfo.get_fcn(fcn)
 tab.construct_edge_matrix(cell)
+# or load the edge table from the binary cache
+#tab = PlanCache("data/eRANO_CellInfo_data1.csv", "data/eRANO_IntTabInfo_data1.csv").get_edge_table(fcn)
+# drop weak edges, density of any plan changes at most report['total_dropped']
+#tab, report = tab.sparsify(threshold=0.01, top_k=5)
 minpci,minnodes = tab.get_pci_counts()
 assert(pci >= minpci)
 print("orignal indensity is {}".format(tab.calculate_total_density()))
-init_ts = time.clock()
+init_ts = time.perf_counter()
 print("init cost {} seconds".format(init_ts - start_ts))
 
-dlx = DLXOptimizer(tab,pci)
+#dlx = DLXOptimizer(tab,pci)
+dlx = ArrayDLXOptimizer(tab,pci)
 dlx.print_info()
-dlx.print_matrix('dlx_matrix_fcn{}_pci{}.csv'.format(fcn,pci))
+dlx.export_matrix('dlx_matrix_fcn{}_pci{}.npz'.format(fcn,pci))
+dlx.stats.trace = True
 dlx.find_answers()
+dlx.stats.print_stats()
+dlx.stats.save_json("output/stats_fcn{}_pci{}.json".format(fcn,pci))
 
-opt_ts = time.clock()
+opt_ts = time.perf_counter()
 dlx.save_answers("output/cell_fcn{}".format(fcn))
 
 print("opt cost {} seconds".format(opt_ts - init_ts))
@@ -0,0 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas
+
+from edgeTable import EdgeTable
+from dlxArray import ArrayDLXOptimizer
+from componentOptimizer import ComponentOptimizer
+from cellInfo import CellInfo
+from planner import Planner
+
+class ParallelPlanner(Planner):
+    """
+    Plan pci of all EARFCNs in the cell info. Every connected component
+    of every EARFCN is one job of a ProcessPoolExecutor, jobs only carry
+    the numpy arrays of the component edge table.
+
+    maxpci is either one value for all EARFCNs or {fcn: maxpci}
+    """
+    def __init__(self, cellInfo, tabFileName, maxpci, optimizer=ArrayDLXOptimizer, workers=None):
+        self.cellInfo         = cellInfo
+        self.tabFileName      = tabFileName
+        self.maxpci           = maxpci
+        self.optimizer        = optimizer
+        self.workers          = workers     # None means number of cpus
+        self.planners         = {}          # {fcn: ComponentOptimizer}
+        self.time_budget      = None        # seconds for all EARFCNs, stop searching after it if not None
+
+        self.init_options()                 # passed to optimizer of each component
+
+    def get_maxpci(self, fcn):
+        if isinstance(self.maxpci, dict):
+            return self.maxpci.get(fcn)
+        return self.maxpci
+
+    def construct_planners(self):
+        self.planners = {}
+        # table info file is parsed once for all EARFCNs
+        df = pandas.read_csv(self.tabFileName)
+        for fcn in sorted(self.cellInfo.fcn_data):
+            maxpci = self.get_maxpci(fcn)
+            if maxpci is None:
+                continue
+            tab = EdgeTable(self.tabFileName)
+            tab.construct_edge_matrix(self.cellInfo.get_fcn(fcn), df)
+            if tab.get_node_count() == 0:
+                continue
+            planner = ComponentOptimizer(tab, maxpci, self.optimizer)
+            for name, value in self.get_options().items():
+                setattr(planner, name, value)
+            self.planners[fcn] = planner
+
+    def find_answers(self):
+        self.construct_planners()
+        deadline = self.get_deadline()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # submit jobs of all EARFCNs before waiting for any of them
+            futures = {}
+            for fcn, planner in self.planners.items():
+                futures[fcn] = planner.submit(executor, deadline)
+            for fcn, planner in self.planners.items():
+                planner.merge_results(future.result() for future in futures[fcn])
+
+        for fcn, planner in self.planners.items():
+            print("=========== fcn {} maxpci {} components {} ===========".format(fcn, planner.maxpci, len(planner.components)))
+            if len(planner.solutions) == 0:
+                print("No answer found")
+            else:
+                print("best indensity {0:10f}, optimal: {1}, timed out: {2}".format(planner.solutions[0][0], planner.optimal,
+                                                                                   planner.timed_out))
+
+    def print_solutions(self, detailed=False):
+        for fcn, planner in self.planners.items():
+            print("=========== fcn {} ===========".format(fcn))
+            planner.print_solutions(detailed)
+
+    def save_answers(self, baseFileName):
+        for fcn, planner in self.planners.items():
+            planner.save_answers(baseFileName + "_fcn{}_".format(fcn))
+
+if __name__ == '__main__':
+    cellinfo = CellInfo("data/eRANO_CellInfo_data1.csv")
+    planner  = ParallelPlanner(cellinfo, "data/eRANO_IntTabInfo_data1.csv", 15)
+    planner.find_answers()
+    planner.save_answers("output/cell")
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas
+
+from edgeTable import EdgeTable
+from cellInfo import CellInfo
+
+class PlanCache(object):
+    """
+    Binary cache of the edge tables of all EARFCNs parsed from one cell
+    info file and one table info file.
+
+    Each EARFCN is saved as the .npy files of EdgeTable.to_arrays, which
+    are memory mapped when loaded. The cache is rebuilt when the path,
+    size and mtime of a source file changed and so did its sha1.
+
+        cacheDir/<hash of source paths>/meta.json
+        cacheDir/<hash of source paths>/fcn<fcn>/<array name>.npy
+    """
+    version = 2
+
+    def __init__(self, cellFileName, tabFileName, cacheDir='cache'):
+        self.cellFileName = cellFileName
+        self.tabFileName  = tabFileName
+        paths = os.path.abspath(cellFileName) + '\n' + os.path.abspath(tabFileName)
+        self.cacheDir     = os.path.join(cacheDir, hashlib.sha1(paths.encode()).hexdigest()[:16])
+        self.meta         = None
+        self.load_meta()
+
+    def get_fcns(self):
+        return list(self.meta['fcns'])
+
+    def get_edge_table(self, fcn):
+        """
+        Return the edge table of fcn, it has no cell info
+        """
+        fcnDir = os.path.join(self.cacheDir, 'fcn{}'.format(fcn))
+        arrays = {}
+        for fileName in os.listdir(fcnDir):
+            arrays[fileName[:-4]] = np.load(os.path.join(fcnDir, fileName), mmap_mode='r')
+        return EdgeTable.from_arrays(arrays, self.tabFileName)
+
+    def load_meta(self):
+        """
+        Load meta of the cache, rebuild the cache if it is out of date
+        """
+        meta = None
+        metaFile = os.path.join(self.cacheDir, 'meta.json')
+        if os.path.exists(metaFile):
+            with open(metaFile) as f:
+                meta = json.load(f)
+            if meta.get('version') != self.version:
+                meta = None
+
+        if meta is None:
+            self.build()
+            return
+
+        sources = {'cell': self.source_info(self.cellFileName, meta['sources']['cell']),
+                   'tab' : self.source_info(self.tabFileName, meta['sources']['tab'])}
+        if sources == meta['sources']:
+            self.meta = meta
+        elif all(sources[key]['sha1'] == meta['sources'][key]['sha1'] for key in sources):
+            # files touched but not changed
+            meta['sources'] = sources
+            self.save_meta(meta)
+            self.meta = meta
+        else:
+            self.build()
+
+    def source_info(self, fileName, cached=None):
+        """
+        Return size, mtime and sha1 of file, sha1 is only calculated
+        if size or mtime is different from the cached one
+        """
+        stat = os.stat(fileName)
+        info = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if cached is not None and cached['size'] == info['size'] and cached['mtime_ns'] == info['mtime_ns']:
+            info['sha1'] = cached['sha1']
+            return info
+        sha1 = hashlib.sha1()
+        with open(fileName, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(chunk)
+        info['sha1'] = sha1.hexdigest()
+        return info
+
+    def build(self):
+        if os.path.exists(self.cacheDir):
+            shutil.rmtree(self.cacheDir)
+        os.makedirs(self.cacheDir)
+
+        sources  = {'cell': self.source_info(self.cellFileName),
+                    'tab' : self.source_info(self.tabFileName)}
+        cellinfo = CellInfo(self.cellFileName)
+        df       = pandas.read_csv(self.tabFileName)
+        fcns     = []
+        for fcn in sorted(cellinfo.fcn_data):
+            tab = EdgeTable(self.tabFileName)
+            tab.construct_edge_matrix(cellinfo.get_fcn(fcn), df)
+            fcnDir = os.path.join(self.cacheDir, 'fcn{}'.format(fcn))
+            os.makedirs(fcnDir)
+            for name, values in tab.to_arrays().items():
+                np.save(os.path.join(fcnDir, name + '.npy'), values)
+            fcns.append(int(fcn))
+
+        # meta is saved at last, a cache without meta is rebuilt
+        meta = {'version': self.version, 'sources': sources, 'fcns': fcns}
+        self.save_meta(meta)
+        self.meta = meta
+
+    def save_meta(self, meta):
+        with open(os.path.join(self.cacheDir, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=1)
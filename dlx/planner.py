@@ -0,0 +1,56 @@
+import time
+
+import pandas as pd
+
+# options of the dlx search, planners pass them to the optimizer of each
+# component, {name: default}
+SEARCH_OPTIONS = {'num_solution'    : 10,      # keep 10 best solutions
+                  'dedup'           : False,   # keep only one of the solutions with same pss of each node
+                  'max_iter_no_new' : 5000,    # stop if no better solution after max_iter_no_new iterations
+                  'bound'           : False,   # prune subtrees which can't beat the worst kept solution
+                  'column_choice'   : 'first', # 'first' or 'mrv', see DLXOptimizer.choose_column
+                  'symmetry'        : False,   # skip interchangeable pcis, see DLXOptimizer.symmetry_rows
+                  'warm_start'      : False}   # seed solutions with the GreedyPlanner plan before search
+
+class Planner(object):
+    """
+    Base of the optimizers and planners, self.solutions is
+    [(indensity, [[nodeid,pci],...])] sorted by indensity, node ids are
+    ids of self.edgeTab
+    """
+    def init_options(self):
+        for name, value in SEARCH_OPTIONS.items():
+            setattr(self, name, value)
+
+    def get_options(self):
+        return dict((name, getattr(self, name)) for name in SEARCH_OPTIONS)
+
+    def get_deadline(self):
+        """
+        Return time.time() when searches started now should stop, jobs
+        in other processes search for the time left to it. None if
+        self.time_budget is None.
+        """
+        if self.time_budget is None:
+            return None
+        return time.time() + self.time_budget
+
+    def print_solutions(self, detailed=False):
+        if detailed:
+            if len(self.solutions) > 5:
+                print("too much solutions, only 5 best will be showed")
+            for i, (indensity, cellinfo) in enumerate(self.solutions[:5]):
+                print("=========== solution {0:3d} indensity {1:10f} ===========".format(i,indensity))
+                for [node_id, pci] in cellinfo:
+                    node_name = self.edgeTab.get_node_name(node_id)
+                    print("{0:20s}:{1:5d}".format(str(node_name),pci))
+        else:
+            print("{} possible solutions".format(len(self.solutions)))
+
+    def save_answers(self,baseFileName):
+        for i, (indensity, cellinfo) in enumerate(self.solutions):
+            fileName = baseFileName + 'sol{}_ind{}.csv'.format(i, int(indensity*10000))
+            newcellinfo = [[self.edgeTab.get_node_name(node_id), pci % 3] for [node_id, pci] in cellinfo]
+            df = pd.DataFrame(newcellinfo)
+            df.columns= ['CellId','PSS']
+            df.to_csv(fileName,index=None)
@@ -0,0 +1,99 @@
+import json
+import time
+
+class SearchStats(object):
+    """
+    Counters and timing of one DLXOptimizer search
+
+        level_visits[level]  rows chosen at level
+        covers/uncovers      columns removed/recovered, including the
+                             node column chosen at each level
+        leaves               complete answers scored
+        pruned               subtrees cut by the bound
+        improvements         solutions kept because they beat the bound
+
+    Times are seconds from the start of the search. If trace is True,
+    every kept solution is also recorded in self.events and saved by
+    save_json.
+    """
+    def __init__(self, nodecount, trace=False):
+        self.level_visits     = [0] * (nodecount + 1)
+        self.covers           = 0
+        self.uncovers         = 0
+        self.leaves           = 0
+        self.pruned           = 0
+        self.improvements     = 0
+        self.build_time       = 0.
+        self.search_time      = 0.
+        self.first_solution   = None    # time of first kept solution
+        self.best_solution    = None    # time of last kept solution
+        self.trace            = trace
+        self.events           = []      # [{'time':, 'leaves':, 'indensity':}, ...]
+        self.start_ts         = None
+
+    def start_search(self):
+        self.start_ts = time.perf_counter()
+
+    def stop_search(self):
+        if self.start_ts is not None:
+            self.search_time += time.perf_counter() - self.start_ts
+            self.start_ts = None
+
+    def record_solution(self, indensity):
+        self.improvements += 1
+        now = self.search_time
+        if self.start_ts is not None:
+            now += time.perf_counter() - self.start_ts
+        if self.first_solution is None:
+            self.first_solution = now
+        self.best_solution = now
+        if self.trace:
+            self.events.append({'time': now, 'leaves': self.leaves, 'indensity': float(indensity)})
+
+    def add(self, other):
+        """
+        Add the counters of other, the stats of a subtree search in a
+        worker process. Times of other are relative to its own search so
+        they are not added.
+        """
+        for level, visits in enumerate(other.level_visits):
+            self.level_visits[level] += visits
+        self.covers       += other.covers
+        self.uncovers     += other.uncovers
+        self.leaves       += other.leaves
+        self.pruned       += other.pruned
+        self.improvements += other.improvements
+
+    def get_nodes_visited(self):
+        return sum(self.level_visits)
+
+    def to_dict(self):
+        info = {'build_time'     : self.build_time,
+                'search_time'    : self.search_time,
+                'nodes_visited'  : self.get_nodes_visited(),
+                'level_visits'   : self.level_visits,
+                'covers'         : self.covers,
+                'uncovers'       : self.uncovers,
+                'leaves'         : self.leaves,
+                'pruned'         : self.pruned,
+                'improvements'   : self.improvements,
+                'first_solution' : self.first_solution,
+                'best_solution'  : self.best_solution}
+        if self.trace:
+            info['events'] = self.events
+        return info
+
+    def save_json(self, fileName):
+        with open(fileName, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def print_stats(self):
+        print("build time: ",self.build_time)
+        print("search time: ",self.search_time)
+        print("nodes visited: ",self.get_nodes_visited())
+        print("covers/uncovers: ",self.covers,self.uncovers)
+        print("leaves scored: ",self.leaves)
+        print("subtrees pruned: ",self.pruned)
+        print("solutions improved: ",self.improvements)
+        print("first solution at: ",self.first_solution)
+        print("best solution at: ",self.best_solution)